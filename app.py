@@ -1,16 +1,44 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import folium
 from streamlit_folium import folium_static
-import plotly.express as px
-import plotly.graph_objects as go
-import requests
+import streamlit.components.v1 as components
+import plotly.io as pio
 from datetime import datetime, timedelta
 import time
-from geopy.distance import geodesic
+import os
+import sys
 import matplotlib.pyplot as plt
 from streamlit_autorefresh import st_autorefresh
+from pipeline import (
+    BREAKERS,
+    ISTANBUL_COORDS,
+    estimate_arrival_time,
+    load_earthquake_data,
+    filter_earthquakes,
+    find_recent_strong_earthquakes,
+    assess_overall_risk,
+)
+import metrics
+from metrics import STAGE_SECONDS, UPSTREAM_REQUESTS, CACHE_REQUESTS, SNAPSHOT_WRITE_FAILURES
+from resilience import Snapshot, StaleWhileRevalidate
+from snapshot import SnapshotReader, write_snapshot
+from dataplane import DataPlaneReader
+from rendering import (
+    ISTANBUL_DISTRICTS,
+    DEFAULT_MIN_MAGNITUDE,
+    DEFAULT_MAX_DISTANCE,
+    DEFAULT_DAYS_BACK,
+    DEFAULT_DISTRICTS,
+    MAP_WIDTH,
+    MAP_HEIGHT,
+    build_earthquake_map,
+    build_risk_gauge,
+    build_statistics_figures,
+)
+
+# Time the whole script run for the debug panel and /metrics
+page_started = time.perf_counter()
 
 # Set page configuration
 st.set_page_config(
@@ -73,266 +101,100 @@ st.markdown("""
 refresh_interval = st.sidebar.slider("Otomatik Yenileme (Saniye)", 30, 300, 60)
 st_autorefresh(interval=refresh_interval * 1000, key="datarefresh")
 
-# Define Istanbul coordinates
-ISTANBUL_COORDS = (41.0082, 28.9784)
-
-# Define target cities and their coordinates
-TARGET_CITIES = {
-    "İstanbul": (41.0082, 28.9784),
-    "Kocaeli": (40.7654, 29.9408),
-    "Tekirdağ": (40.9781, 27.5126),
-    "Sakarya": (40.7731, 30.3925),
-    "Yalova": (40.6550, 29.2774),
-    "Bursa": (40.1885, 29.0610)
-}
-
-# Istanbul districts and their coordinates
-ISTANBUL_DISTRICTS = {
-    "Adalar": (40.8760, 29.0878),
-    "Arnavutköy": (41.1839, 28.7419),
-    "Ataşehir": (40.9830, 29.1291),
-    "Avcılar": (41.0204, 28.7187),
-    "Bağcılar": (41.0378, 28.8500),
-    "Bahçelievler": (41.0021, 28.8577),
-    "Bakırköy": (40.9817, 28.8773),
-    "Başakşehir": (41.0931, 28.8026),
-    "Bayrampaşa": (41.0467, 28.8967),
-    "Beşiktaş": (41.0434, 29.0086),
-    "Beykoz": (41.1473, 29.0988),
-    "Beylikdüzü": (41.0103, 28.6428),
-    "Beyoğlu": (41.0366, 28.9735),
-    "Büyükçekmece": (41.0195, 28.5933),
-    "Çatalca": (41.1426, 28.4515),
-    "Çekmeköy": (41.0330, 29.1872),
-    "Esenler": (41.0437, 28.8763),
-    "Esenyurt": (41.0290, 28.6728),
-    "Eyüp": (41.0478, 28.9339),
-    "Fatih": (41.0187, 28.9394),
-    "Gaziosmanpaşa": (41.0680, 28.9097),
-    "Güngören": (41.0178, 28.8898),
-    "Kadıköy": (40.9926, 29.0233),
-    "Kağıthane": (41.0784, 28.9833),
-    "Kartal": (40.8884, 29.1872),
-    "Küçükçekmece": (41.0015, 28.7981),
-    "Maltepe": (40.9351, 29.1362),
-    "Pendik": (40.8750, 29.2583),
-    "Sancaktepe": (41.0006, 29.2266),
-    "Sarıyer": (41.1693, 29.0557),
-    "Silivri": (41.0731, 28.2464),
-    "Sultanbeyli": (40.9650, 29.2652),
-    "Sultangazi": (41.1066, 28.8679),
-    "Şile": (41.1748, 29.6119),
-    "Şişli": (41.0603, 28.9868),
-    "Tuzla": (40.8156, 29.3009),
-    "Ümraniye": (41.0161, 29.0964),
-    "Üsküdar": (41.0284, 29.0258),
-    "Zeytinburnu": (41.0070, 28.9000)
-}
-# Function to calculate risk level for Istanbul based on earthquake parameters
-def calculate_risk_level(magnitude, depth, distance, time_since):
-    # Base risk from magnitude
-    if magnitude >= 7.0:
-        base_risk = 5  # Very High
-    elif magnitude >= 6.0:
-        base_risk = 4  # High
-    elif magnitude >= 5.0:
-        base_risk = 3  # Moderate
-    elif magnitude >= 4.0:
-        base_risk = 2  # Low
-    else:
-        base_risk = 1  # Very Low
-    
-    # Adjust for depth (shallow earthquakes are more dangerous)
-    if depth < 10:
-        depth_factor = 1.5
-    elif depth < 30:
-        depth_factor = 1.2
-    elif depth < 50:
-        depth_factor = 1.0
-    else:
-        depth_factor = 0.8
-    
-    # Adjust for distance
-    if distance < 50:
-        distance_factor = 1.5
-    elif distance < 100:
-        distance_factor = 1.2
-    elif distance < 200:
-        distance_factor = 0.9
-    else:
-        distance_factor = 0.6
-    
-    # Adjust for time (more recent earthquakes might indicate active fault movement)
-    if time_since.total_seconds() < 3600:  # Last hour
-        time_factor = 1.3
-    elif time_since.total_seconds() < 86400:  # Last day
-        time_factor = 1.1
-    elif time_since.total_seconds() < 604800:  # Last week
-        time_factor = 0.9
-    else:
-        time_factor = 0.7
-    
-    # Calculate final risk score
-    risk_score = base_risk * depth_factor * distance_factor * time_factor
-    
-    # Normalize to 1-5 scale
-    risk_score = max(1, min(5, risk_score))
-    
-    return risk_score
+# Data older than this is refreshed in the background while the old copy is still served
+DATA_MAX_AGE = 60
 
-# Function to estimate arrival time of seismic waves
-def estimate_arrival_time(distance_km):
-    # P-waves travel at approximately 6-8 km/s
-    p_wave_speed = 7  # km/s
-    
-    # S-waves travel at approximately 3-4 km/s
-    s_wave_speed = 3.5  # km/s
-    
-    p_wave_time = distance_km / p_wave_speed
-    s_wave_time = distance_km / s_wave_speed
-    
-    return p_wave_time, s_wave_time
+# Past this age the data no longer supports an "all clear"; the threat status is shown as unknown
+DATA_MAX_STALENESS = 5 * DATA_MAX_AGE
 
-# Function to fetch earthquake data from Kandilli Observatory API
-def fetch_kandilli_data():
-    try:
-        url = "http://www.koeri.boun.edu.tr/scripts/lst9.asp"
-        response = requests.get(url, timeout=10)
-        
-        if response.status_code == 200:
-            # Parse the text response (custom format from Kandilli)
-            content = response.text
-            lines = content.split('\n')
-            
-            # Find where the earthquake data starts (after the header)
-            start_idx = 0
-            for i, line in enumerate(lines):
-                if "-------------" in line:
-                    start_idx = i + 1
-                    break
-            
-            # Parse each earthquake entry
-            earthquakes = []
-            for i in range(start_idx, len(lines)):
-                line = lines[i].strip()
-                if not line:
-                    continue
-                
-                try:
-                    # Format is like: 2023.06.05 12:53:54 40.6877 27.5055 7.0 -.- 3.0 -.- SARKOYMARMARA_DENIZI (CANAKKALE) İlksel
-                    parts = line.split()
-                    if len(parts) < 9:
-                        continue
-                    
-                    date = parts[0]
-                    time_str = parts[1]
-                    lat = float(parts[2])
-                    lon = float(parts[3])
-                    depth = float(parts[4])
-                    magnitude = float(parts[6])
-                    
-                    # Extract location
-                    loc_start = line.find('(')
-                    loc_end = line.find(')')
-                    if loc_start > 0 and loc_end > loc_start:
-                        location = line[loc_start+1:loc_end]
-                    else:
-                        location = "Unknown"
-                    
-                    # Calculate distance to Istanbul
-                    distance_to_istanbul = geodesic((lat, lon), ISTANBUL_COORDS).kilometers
-                    
-                    # Parse datetime
-                    dt_str = f"{date} {time_str}"
-                    dt = datetime.strptime(dt_str, "%Y.%m.%d %H:%M:%S")
-                    
-                    earthquakes.append({
-                        'date': dt,
-                        'latitude': lat,
-                        'longitude': lon,
-                        'depth': depth,
-                        'magnitude': magnitude,
-                        'location': location,
-                        'distance_to_istanbul': distance_to_istanbul
-                    })
-                except Exception as e:
-                    # Skip entries that can't be parsed
-                    continue
-            
-            # Sort by date (newest first)
-            earthquakes.sort(key=lambda x: x['date'], reverse=True)
-            return earthquakes
-        else:
-            st.error("Failed to fetch data from Kandilli Observatory.")
-            return []
-    except Exception as e:
-        st.error(f"Error fetching earthquake data: {e}")
-        return []
-
-# Alternative function to fetch from USGS if Kandilli fails
-def fetch_usgs_data():
-    try:
-        # Get earthquakes from the past 30 days with magnitude > 2.5 near Turkey
-        url = "https://earthquake.usgs.gov/fdsnws/event/1/query"
-        params = {
-            "format": "geojson",
-            "starttime": (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d"),
-            "endtime": datetime.now().strftime("%Y-%m-%d"),
-            "minmagnitude": 2.5,
-            "latitude": ISTANBUL_COORDS[0],
-            "longitude": ISTANBUL_COORDS[1],
-            "maxradiuskm": 500
-        }
-        
-        response = requests.get(url, params=params)
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            earthquakes = []
-            for feature in data['features']:
-                props = feature['properties']
-                coords = feature['geometry']['coordinates']
-                
-                # Extract data
-                magnitude = props['mag']
-                dt = datetime.fromtimestamp(props['time'] / 1000)
-                location = props['place']
-                depth = coords[2]
-                longitude = coords[0]
-                latitude = coords[1]
-                
-                # Calculate distance to Istanbul
-                distance_to_istanbul = geodesic((latitude, longitude), ISTANBUL_COORDS).kilometers
-                
-                earthquakes.append({
-                    'date': dt,
-                    'latitude': latitude,
-                    'longitude': longitude,
-                    'depth': depth,
-                    'magnitude': magnitude,
-                    'location': location,
-                    'distance_to_istanbul': distance_to_istanbul
-                })
-            
-            # Sort by date (newest first)
-            earthquakes.sort(key=lambda x: x['date'], reverse=True)
-            return earthquakes
-        else:
-            st.error("Failed to fetch data from USGS.")
-            return []
-    except Exception as e:
-        st.error(f"Error fetching USGS earthquake data: {e}")
-        return []
-
-# Main function to get earthquake data (tries Kandilli first, falls back to USGS)
-@st.cache_data(ttl=60)
+# Binary catalog snapshot shared by every worker on the host (unset disables it)
+SNAPSHOT_PATH = os.environ.get("DEPREM_SNAPSHOT_PATH")
+
+# Fetch from upstream and publish the result for the other workers
+def load_and_publish_earthquake_data():
+    earthquakes = load_earthquake_data()
+    if SNAPSHOT_PATH:
+        try:
+            write_snapshot(SNAPSHOT_PATH, earthquakes, datetime.now())
+        except Exception as e:
+            # Publishing is best effort; this worker can still serve the data from memory
+            SNAPSHOT_WRITE_FAILURES.inc()
+            print(f"could not write snapshot to {SNAPSHOT_PATH}: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+    return earthquakes
+
+# Shared earthquake data source: serves the last good snapshot and refreshes it off the render path
+@st.cache_resource
+def get_data_source():
+    return StaleWhileRevalidate(load_and_publish_earthquake_data, max_age=DATA_MAX_AGE, retry_interval=15)
+
+# Read-only mapping of the published snapshot, one per process
+@st.cache_resource
+def get_snapshot_reader():
+    return SnapshotReader(SNAPSHOT_PATH)
+
+# Main function to get earthquake data without waiting for a failing upstream
 def get_earthquake_data():
-    kandilli_data = fetch_kandilli_data()
-    if kandilli_data:
-        return kandilli_data
+    source = get_data_source()
+    
+    # Adopt a newer snapshot published by another worker; on cold start this replaces the first fetch
+    if SNAPSHOT_PATH:
+        published = get_snapshot_reader().get()
+        if published is not None:
+            # The catalog is only materialized when it is newer than this worker's own copy
+            source.prime(published.events, published.fetched_at)
+    
+    # Only a cold process without any data waits (briefly) for the first load
+    snapshot = source.get(wait=3)
+    if snapshot.data is None:
+        result = "miss"
+    elif (datetime.now() - snapshot.fetched_at).total_seconds() >= DATA_MAX_AGE:
+        result = "stale"
     else:
-        return fetch_usgs_data()
+        result = "hit"
+    CACHE_REQUESTS.inc(cache="earthquake_data", result=result)
+    return snapshot
+
+# Front-end only mode: serve what an ingest node (ingest.py) published instead of fetching upstream
+DATA_DIR = os.environ.get("DEPREM_DATA_DIR")
+
+# The ingest node refreshes every DEPREM_INGEST_INTERVAL seconds (ingest.py --interval); a release
+# that has not been replaced for a few intervals means the node is down or stuck
+INGEST_INTERVAL = float(os.environ.get("DEPREM_INGEST_INTERVAL", "60"))
+RELEASE_MAX_AGE = 5 * INGEST_INTERVAL
+
+@st.cache_resource
+def get_data_plane_reader():
+    return DataPlaneReader(DATA_DIR)
+
+# Function to present a published release like the local data source
+def snapshot_from_release(release):
+    if release is None:
+        return Snapshot(None, None, "Henüz yayınlanmış veri yok.", False)
+    data = release.events()
+    if data is None:
+        return Snapshot(None, None, release.error, False)
+    error = release.error
+    age = (datetime.now() - release.fetched_at).total_seconds()
+    if error is None and age > RELEASE_MAX_AGE:
+        error = f"Veri katmanı {int(age // 60)} dakikadır güncellenmedi (ingest düğümü çalışmıyor olabilir)."
+    CACHE_REQUESTS.inc(cache="earthquake_data", result="hit" if age <= RELEASE_MAX_AGE else "stale")
+    return Snapshot(data, release.fetched_at, error, False)
+
+# Serve /metrics once per process (DEPREM_METRICS_PORT=0 disables it, DEPREM_METRICS_HOST
+# defaults to loopback so the endpoint is not exposed with every `streamlit run`)
+@st.cache_resource
+def start_metrics_server():
+    port = int(os.environ.get("DEPREM_METRICS_PORT", "9108"))
+    if not port:
+        return None
+    try:
+        return metrics.start_http_server(port, host=os.environ.get("DEPREM_METRICS_HOST", "127.0.0.1"))
+    except OSError as e:
+        # Usually another replica on this host owns the port; give each one its own DEPREM_METRICS_PORT
+        print(f"metrics endpoint disabled, could not bind port {port}: {e}", file=sys.stderr, flush=True)
+        return None
+
+start_metrics_server()
 
 # Sidebar for filters and settings
 with st.sidebar:
@@ -340,11 +202,11 @@ with st.sidebar:
     st.title("Filtreler ve Ayarlar")
     
     st.subheader("Deprem Filtreleri")
-    min_magnitude = st.slider("Minimum Büyüklük", 0.0, 10.0, 3.0, 0.1)
+    min_magnitude = st.slider("Minimum Büyüklük", 0.0, 10.0, DEFAULT_MIN_MAGNITUDE, 0.1)
     
-    max_distance = st.slider("İstanbul'a Maksimum Uzaklık (km)", 50, 1000, 500)
+    max_distance = st.slider("İstanbul'a Maksimum Uzaklık (km)", 50, 1000, DEFAULT_MAX_DISTANCE)
     
-    days_back = st.slider("Son Kaç Gün", 1, 30, 7)
+    days_back = st.slider("Son Kaç Gün", 1, 30, DEFAULT_DAYS_BACK)
     min_date = datetime.now() - timedelta(days=days_back)
     
     st.subheader("Bildirim Ayarları")
@@ -355,32 +217,50 @@ with st.sidebar:
     selected_districts = st.multiselect(
         "İlçeler",
         list(ISTANBUL_DISTRICTS.keys()),
-        default=["Kadıköy", "Fatih", "Beşiktaş", "Üsküdar"]
+        default=DEFAULT_DISTRICTS
     )
     
+    # Optional debug panel with the pipeline timings of this process
+    show_debug_panel = st.checkbox("Performans Paneli (Geliştirici)", value=False)
+    
     # Add informational box in sidebar
     st.info("Bu uygulama, Kandilli Rasathanesi ve USGS verilerini kullanarak İstanbul ve çevresi için deprem risk analizi yapar. Veriler her {} saniyede bir güncellenir.".format(refresh_interval))
 
 # Get earthquake data
-earthquakes = get_earthquake_data()
+release = get_data_plane_reader().get() if DATA_DIR else None
+data_snapshot = snapshot_from_release(release) if DATA_DIR else get_earthquake_data()
+earthquakes = data_snapshot.data if data_snapshot.data is not None else []
+data_available = data_snapshot.data is not None
+max_staleness = RELEASE_MAX_AGE if DATA_DIR else DATA_MAX_STALENESS
+data_current = data_available and (datetime.now() - data_snapshot.fetched_at).total_seconds() <= max_staleness
 
 # Apply filters
-filtered_earthquakes = [
-    eq for eq in earthquakes 
-    if eq['magnitude'] >= min_magnitude 
-    and eq['date'] >= min_date
-    and eq['distance_to_istanbul'] <= max_distance
-]
+filtered_earthquakes = filter_earthquakes(earthquakes, min_magnitude, min_date, max_distance)
 # Main content
 st.markdown("<h1 class='main-header'>İstanbul ve Çevresi İçin Yapay Zeka Tabanlı Deprem Erken Uyarı Sistemi</h1>", unsafe_allow_html=True)
 
+# Data freshness indicator (stale data is served while a refresh runs in the background)
+if data_available:
+    data_age = int((datetime.now() - data_snapshot.fetched_at).total_seconds())
+    age_text = f"{data_age} saniye" if data_age < 120 else f"{data_age // 60} dakika"
+    if data_snapshot.error is not None:
+        st.warning(f"Son güncelleme başarısız oldu, {age_text} önceki veriler gösteriliyor. Hata: {data_snapshot.error}")
+    elif DATA_DIR:
+        # Front-ends never refresh themselves; the ingest node publishes the next release
+        st.caption(f"🕒 Veriler {age_text} önce alındı (ingest düğümü, yayın {release.version}).")
+    elif data_age >= DATA_MAX_AGE:
+        st.caption(f"🕒 Veriler {age_text} önce alındı, arka planda güncelleniyor.")
+    else:
+        st.caption(f"🕒 Veriler {age_text} önce alındı.")
+elif data_snapshot.refreshing:
+    st.info("Deprem verileri yükleniyor...")
+    st_autorefresh(interval=3000, key="dataloading")
+else:
+    st.error(f"Deprem verileri alınamadı: {data_snapshot.error}")
+    st_autorefresh(interval=15000, key="dataretry")
+
 # Recent strong earthquake alert (if any)
-recent_strong_earthquakes = [
-    eq for eq in earthquakes 
-    if eq['magnitude'] >= notification_threshold 
-    and (datetime.now() - eq['date']).total_seconds() < 3600 * 24  # Last 24 hours
-    and eq['distance_to_istanbul'] <= 300  # Within 300km of Istanbul
-]
+recent_strong_earthquakes = find_recent_strong_earthquakes(earthquakes, notification_threshold, datetime.now())
 
 if recent_strong_earthquakes:
     st.markdown("<div class='warning-box'>", unsafe_allow_html=True)
@@ -400,6 +280,12 @@ if recent_strong_earthquakes:
         - S-dalgası varış süresi: ~{s_time:.1f} saniye
         """)
     
+    st.markdown("</div>", unsafe_allow_html=True)
+elif not data_current:
+    # Missing or too old data must never look like "no threat"
+    st.markdown("<div class='warning-box'>", unsafe_allow_html=True)
+    st.markdown("### ❔ Tehdit durumu şu an bilinmiyor.")
+    st.markdown("Güncel deprem verilerine ulaşılamadığı için İstanbul ve çevresi için bir değerlendirme yapılamıyor. Resmi kaynakları (AFAD, Kandilli) takip edin.")
     st.markdown("</div>", unsafe_allow_html=True)
 else:
     st.markdown("<div class='safe-box'>", unsafe_allow_html=True)
@@ -413,57 +299,25 @@ col1, col2 = st.columns([3, 2])
 with col1:
     st.markdown("<h2 class='sub-header'>Deprem Haritası</h2>", unsafe_allow_html=True)
     
-    # Create a map centered on Istanbul
-    m = folium.Map(location=ISTANBUL_COORDS, zoom_start=7)
-    
-    # Add markers for filtered earthquakes
-    for eq in filtered_earthquakes:
-        # Determine color based on magnitude
-        if eq['magnitude'] >= 5.0:
-            color = 'red'
-        elif eq['magnitude'] >= 4.0:
-            color = 'orange'
-        else:
-            color = 'green'
-        
-        # Create popup content
-        popup_content = f"""
-        <strong>Tarih:</strong> {eq['date'].strftime('%d.%m.%Y %H:%M:%S')}<br>
-        <strong>Büyüklük:</strong> {eq['magnitude']:.1f}<br>
-        <strong>Derinlik:</strong> {eq['depth']} km<br>
-        <strong>Konum:</strong> {eq['location']}<br>
-        <strong>İstanbul'a uzaklık:</strong> {eq['distance_to_istanbul']:.1f} km
-        """
-        
-        # Add marker
-        folium.CircleMarker(
-            location=[eq['latitude'], eq['longitude']],
-            radius=eq['magnitude'] * 2,  # Size based on magnitude
-            color=color,
-            fill=True,
-            fill_opacity=0.7,
-            popup=folium.Popup(popup_content, max_width=300)
-        ).add_to(m)
+    map_started = time.perf_counter()
     
-    # Add markers for target cities
-    for city, coords in TARGET_CITIES.items():
-        folium.Marker(
-            location=coords,
-            popup=city,
-            icon=folium.Icon(color='blue', icon='info-sign')
-        ).add_to(m)
-    
-    # Add markers for selected Istanbul districts
-    for district in selected_districts:
-        if district in ISTANBUL_DISTRICTS:
-            folium.Marker(
-                location=ISTANBUL_DISTRICTS[district],
-                popup=f"İstanbul - {district}",
-                icon=folium.Icon(color='purple', icon='home')
-            ).add_to(m)
-    
-    # Display the map
-    folium_static(m)
+    # Reuse the published map when the sidebar still shows the filters it was rendered with
+    # (its "last N days" window is anchored at the release's fetch time)
+    map_filters = {
+        "min_magnitude": min_magnitude,
+        "max_distance": max_distance,
+        "days_back": days_back,
+        "districts": selected_districts,
+    }
+    if release is not None and release.map_html and release.map_filters == map_filters:
+        CACHE_REQUESTS.inc(cache="prerendered_map", result="hit")
+        components.html(release.map_html, width=MAP_WIDTH, height=MAP_HEIGHT)
+    else:
+        if release is not None:
+            CACHE_REQUESTS.inc(cache="prerendered_map", result="miss")
+        # Display the map
+        folium_static(build_earthquake_map(filtered_earthquakes, selected_districts), width=MAP_WIDTH, height=MAP_HEIGHT)
+    STAGE_SECONDS.observe(time.perf_counter() - map_started, stage="render_map")
     
     # Add legend for the map
     st.markdown("""
@@ -507,50 +361,23 @@ with col2:
     st.markdown("<h2 class='sub-header'>İstanbul için Risk Değerlendirmesi</h2>", unsafe_allow_html=True)
     
     # Calculate current risk level based on recent earthquakes
-    risk_scores = []
-    for eq in earthquakes[:50]:  # Consider the 50 most recent earthquakes
-        time_since = datetime.now() - eq['date']
-        if time_since.total_seconds() <= 604800:  # Last week
-            risk = calculate_risk_level(
-                eq['magnitude'], 
-                eq['depth'], 
-                eq['distance_to_istanbul'], 
-                time_since
-            )
-            risk_scores.append(risk)
+    if release is not None:
+        overall_risk = release.risk
+    else:
+        overall_risk = assess_overall_risk(earthquakes, datetime.now())
     
     # Calculate overall risk (if we have data)
-    if risk_scores:
-        overall_risk = np.mean(risk_scores)
+    if overall_risk is not None:
+        gauge_started = time.perf_counter()
         
         # Display risk meter
-        fig = go.Figure(go.Indicator(
-            mode = "gauge+number+delta",
-            value = overall_risk,
-            domain = {'x': [0, 1], 'y': [0, 1]},
-            title = {'text': "Risk Seviyesi"},
-            gauge = {
-                'axis': {'range': [0, 5], 'tickwidth': 1},
-                'bar': {'color': "darkblue"},
-                'bgcolor': "white",
-                'borderwidth': 2,
-                'bordercolor': "gray",
-                'steps': [
-                    {'range': [0, 1], 'color': '#2ECC71'},
-                    {'range': [1, 2], 'color': '#82E0AA'},
-                    {'range': [2, 3], 'color': '#F7DC6F'},
-                    {'range': [3, 4], 'color': '#F5B041'},
-                    {'range': [4, 5], 'color': '#E74C3C'}
-                ],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 4
-                }
-            }
-        ))
+        if release is not None and 'gauge' in release.figures:
+            fig = pio.from_json(release.figures['gauge'])
+        else:
+            fig = build_risk_gauge(overall_risk)
         
         st.plotly_chart(fig, use_container_width=True)
+        STAGE_SECONDS.observe(time.perf_counter() - gauge_started, stage="render_gauge")
         
         # Risk interpretation
         if overall_risk < 1.5:
@@ -578,66 +405,35 @@ tab1, tab2, tab3 = st.tabs(["İstatistikler", "Güvenlik Rehberi", "Güvenli Top
 
 with tab1:
     st.markdown("<h3 class='sub-header'>Deprem İstatistikleri</h3>", unsafe_allow_html=True)
+    charts_started = time.perf_counter()
     
-    # Convert to dataframe for analysis
-    df = pd.DataFrame(earthquakes)
+    # Statistics only depend on the full catalog, so a published release already has them
+    if release is not None:
+        stats_figures = {name: pio.from_json(fig) for name, fig in release.figures.items() if name != 'gauge'}
+    else:
+        stats_figures = build_statistics_figures(earthquakes)
     
-    if not df.empty:
+    if stats_figures:
         # Display some statistics
         col_stats1, col_stats2 = st.columns(2)
         
         with col_stats1:
             # Magnitude distribution
-            fig = px.histogram(
-                df, 
-                x="magnitude", 
-                nbins=20, 
-                title="Deprem Büyüklük Dağılımı",
-                color_discrete_sequence=['#3498DB']
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(stats_figures['magnitude'], use_container_width=True)
         
         with col_stats2:
             # Depth distribution
-            fig = px.histogram(
-                df, 
-                x="depth", 
-                nbins=20, 
-                title="Deprem Derinlik Dağılımı",
-                color_discrete_sequence=['#2ECC71']
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(stats_figures['depth'], use_container_width=True)
         
         # Time series of earthquakes
-        if 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'])
-            df.set_index('date', inplace=True)
-            
-            # Resample by day and count
-            daily_counts = df.resample('D').size()
-            
-            fig = px.line(
-                daily_counts, 
-                title="Günlük Deprem Sayısı",
-                labels={'value': 'Deprem Sayısı', 'date': 'Tarih'}
-            )
-            st.plotly_chart(fig, use_container_width=True)
+        if 'daily' in stats_figures:
+            st.plotly_chart(stats_figures['daily'], use_container_width=True)
         
         # Magnitude vs. Depth scatter plot
-        fig = px.scatter(
-            df, 
-            x="magnitude", 
-            y="depth",
-            title="Büyüklük ve Derinlik İlişkisi",
-            labels={'magnitude': 'Büyüklük', 'depth': 'Derinlik (km)'},
-            color="magnitude",
-            size="magnitude",
-            color_continuous_scale=px.colors.sequential.Plasma
-        )
-        fig.update_yaxes(autorange="reversed")  # Reverse y-axis so smaller depth values are at the top
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(stats_figures['scatter'], use_container_width=True)
     else:
         st.warning("İstatistikler için veri bulunmamaktadır.")
+    STAGE_SECONDS.observe(time.perf_counter() - charts_started, stage="render_charts")
 
 with tab2:
     st.markdown("<h3 class='sub-header'>Deprem Güvenlik Rehberi</h3>", unsafe_allow_html=True)
@@ -761,6 +557,39 @@ with tab3:
     > **NOT:** Yukarıdaki haritada gösterilen toplanma alanları örnek niteliğindedir. Gerçek ve güncel toplanma alanlarını AFAD'ın resmi kaynaklarından kontrol ediniz.
     """)
 
+STAGE_SECONDS.observe(time.perf_counter() - page_started, stage="page")
+
+# Debug panel with the timings and counters collected by this process
+if show_debug_panel:
+    with st.expander("Performans Paneli", expanded=True):
+        stage_rows = [
+            {
+                "Aşama": row["labels"]["stage"],
+                "Çağrı": row["count"],
+                "Ortalama (ms)": round(row["mean"] * 1000, 2),
+                "p50 ≤ (ms)": row["p50"] * 1000,
+                "p95 ≤ (ms)": row["p95"] * 1000,
+            }
+            for row in STAGE_SECONDS.summary()
+        ]
+        st.dataframe(pd.DataFrame(stage_rows), use_container_width=True)
+        
+        upstream_rows = [
+            {"Kaynak": key[0], "Sonuç": key[1], "Sayı": value}
+            for key, value in UPSTREAM_REQUESTS.samples()
+        ]
+        cache_rows = [
+            {"Önbellek": key[0], "Sonuç": key[1], "Sayı": value}
+            for key, value in CACHE_REQUESTS.samples()
+        ]
+        st.markdown("Devre kesiciler: " + ", ".join(f"{name}: {breaker.state}" for name, breaker in BREAKERS.items()))
+        col_debug1, col_debug2 = st.columns(2)
+        with col_debug1:
+            st.dataframe(pd.DataFrame(upstream_rows), use_container_width=True)
+        with col_debug2:
+            st.dataframe(pd.DataFrame(cache_rows), use_container_width=True)
+        st.caption("Prometheus metrikleri: http://<sunucu>:{}/metrics".format(os.environ.get("DEPREM_METRICS_PORT", "9108")))
+
 # Footer
 st.markdown("<div class='footer'>", unsafe_allow_html=True)
 st.markdown("© 2025 İstanbul Deprem Erken Uyarı Sistemi | Bu uygulama sadece bilgilendirme amaçlıdır ve resmi bir acil durum sistemi değildir.")
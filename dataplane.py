@@ -0,0 +1,167 @@
+"""Shared data plane between one ingest node and many stateless front-ends.
+
+The ingest node (`ingest.py`) publishes every refresh as an immutable,
+versioned release directory:
+
+    <data_dir>/v00000042/catalog.snap   binary catalog (see snapshot.py)
+    <data_dir>/v00000042/map.html       map prerendered for the default filters
+    <data_dir>/v00000042/figures.json   plotly figures as JSON, by name
+    <data_dir>/manifest.json            points at the current release
+
+The manifest is replaced atomically after the release directory is complete,
+so readers never see a half-written release. The previous few releases are
+kept so a reader that has just read an older manifest can still open them.
+There must be a single publisher per data directory.
+"""
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+from metrics import timed
+from snapshot import CatalogSnapshot, SnapshotError, write_snapshot
+
+MANIFEST = "manifest.json"
+FORMAT = 1
+KEEP_RELEASES = 3
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+# Function to read the current manifest (None if nothing was published yet)
+def read_manifest(data_dir):
+    try:
+        with open(os.path.join(data_dir, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _write_manifest(data_dir, manifest):
+    _write_atomic(os.path.join(data_dir, MANIFEST), json.dumps(manifest, indent=2).encode("utf-8"))
+
+# Function to publish a new release, returns its version.
+# `figures` maps a figure name to its plotly JSON; `map_filters` describes what map.html shows.
+@timed("publish")
+def publish_release(data_dir, earthquakes, fetched_at, overall_risk, map_html, figures,
+                    map_filters=None, keep=KEEP_RELEASES):
+    os.makedirs(data_dir, exist_ok=True)
+    previous = read_manifest(data_dir)
+    version = (previous["version"] if previous else 0) + 1
+    name = f"v{version:08d}"
+    release_dir = os.path.join(data_dir, name)
+    os.makedirs(release_dir, exist_ok=True)
+
+    write_snapshot(os.path.join(release_dir, "catalog.snap"), earthquakes, fetched_at)
+    _write_atomic(os.path.join(release_dir, "map.html"), map_html.encode("utf-8"))
+    _write_atomic(os.path.join(release_dir, "figures.json"), json.dumps(figures).encode("utf-8"))
+
+    _write_manifest(data_dir, {
+        "format": FORMAT,
+        "version": version,
+        "fetched_at": fetched_at.isoformat(),
+        "published_at": datetime.now().isoformat(),
+        "event_count": len(earthquakes),
+        "risk": None if overall_risk is None else float(overall_risk),
+        "map_filters": map_filters,
+        "error": None,
+        "files": {
+            "catalog": f"{name}/catalog.snap",
+            "map": f"{name}/map.html",
+            "figures": f"{name}/figures.json",
+        },
+    })
+
+    # Drop all but the newest few releases
+    releases = sorted(d for d in os.listdir(data_dir) if d.startswith("v") and d[1:].isdigit())
+    for old in releases[:-keep]:
+        shutil.rmtree(os.path.join(data_dir, old), ignore_errors=True)
+    return version
+
+# Function to record a failed refresh; front-ends keep serving the last release and show the error
+def record_failure(data_dir, message):
+    os.makedirs(data_dir, exist_ok=True)
+    manifest = read_manifest(data_dir) or {
+        "format": FORMAT,
+        "version": 0,
+        "fetched_at": None,
+        "event_count": 0,
+        "risk": None,
+        "map_filters": None,
+        "files": None,
+    }
+    manifest["error"] = message
+    manifest["failed_at"] = datetime.now().isoformat()
+    _write_manifest(data_dir, manifest)
+
+# One published release as seen by a front-end. Everything is opened up front, so a
+# release that is pruned later keeps working for the readers that already hold it.
+class Release:
+    def __init__(self, data_dir, manifest):
+        self.data_dir = data_dir
+        self.manifest = manifest
+        self.version = manifest["version"]
+        self.fetched_at = datetime.fromisoformat(manifest["fetched_at"]) if manifest["fetched_at"] else None
+        self.risk = manifest["risk"]
+        self.map_filters = manifest.get("map_filters")
+        self.error = manifest.get("error")
+        files = manifest.get("files") or {}
+        self.snapshot = CatalogSnapshot(os.path.join(data_dir, files["catalog"])) if "catalog" in files else None
+        self.map_html = self._read(files, "map")
+        # Plotly JSON strings by figure name
+        figures = self._read(files, "figures")
+        self.figures = json.loads(figures) if figures else {}
+
+    def _read(self, files, key):
+        if key not in files:
+            return None
+        with open(os.path.join(self.data_dir, files[key]), encoding="utf-8") as f:
+            return f.read()
+
+    def events(self):
+        return self.snapshot.events() if self.snapshot is not None else None
+
+# Follows the manifest of a data directory, reopening a release only when a new version is published
+class DataPlaneReader:
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self._stat = None
+        self._release = None
+
+    def get(self):
+        try:
+            stat = os.stat(os.path.join(self.data_dir, MANIFEST))
+        except FileNotFoundError:
+            return self._release
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key == self._stat:
+            return self._release
+
+        try:
+            manifest = read_manifest(self.data_dir)
+            if manifest is None or manifest.get("format") != FORMAT:
+                return self._release
+            current = self._release
+            if current is not None and current.version == manifest["version"]:
+                # Same data, only the refresh status changed
+                current.manifest = manifest
+                current.error = manifest.get("error")
+            else:
+                self._release = Release(self.data_dir, manifest)
+        except (OSError, ValueError, KeyError, SnapshotError):
+            # Keep serving the release we already have
+            return self._release
+        self._stat = key
+        return self._release
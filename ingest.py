@@ -0,0 +1,117 @@
+"""Ingest/compute node: fetch upstream catalogs once and publish them for every front-end.
+
+Runs the fetch -> parse -> risk -> prerender pipeline on a fixed interval and
+publishes each result as a versioned release (see dataplane.py). Any number
+of Streamlit replicas started with the same DEPREM_DATA_DIR then serve the
+release without contacting Kandilli or USGS themselves.
+
+    python ingest.py --data-dir /var/lib/deprem
+    DEPREM_DATA_DIR=/var/lib/deprem streamlit run app.py
+"""
+import argparse
+import os
+import time
+import traceback
+from datetime import datetime, timedelta
+from functools import partial
+
+import metrics
+from dataplane import publish_release, record_failure
+from pipeline import (
+    KANDILLI_URL,
+    USGS_URL,
+    UpstreamError,
+    assess_overall_risk,
+    fetch_kandilli_data,
+    fetch_usgs_data,
+    filter_earthquakes,
+    load_earthquake_data,
+)
+from rendering import (
+    DEFAULT_DAYS_BACK,
+    DEFAULT_DISTRICTS,
+    DEFAULT_MAX_DISTANCE,
+    DEFAULT_MIN_MAGNITUDE,
+    build_earthquake_map,
+    build_risk_gauge,
+    build_statistics_figures,
+    render_map_html,
+)
+
+# Filters the prerendered map was built with; front-ends only reuse it when theirs match
+DEFAULT_MAP_FILTERS = {
+    "min_magnitude": DEFAULT_MIN_MAGNITUDE,
+    "max_distance": DEFAULT_MAX_DISTANCE,
+    "days_back": DEFAULT_DAYS_BACK,
+    "districts": DEFAULT_DISTRICTS,
+}
+
+# Function to fetch, compute and publish one release, returns its version (usgs_url=None skips USGS)
+def run_once(data_dir, kandilli_url=KANDILLI_URL, usgs_url=USGS_URL):
+    sources = (("kandilli", partial(fetch_kandilli_data, url=kandilli_url)),)
+    if usgs_url is not None:
+        sources += (("usgs", partial(fetch_usgs_data, url=usgs_url)),)
+    earthquakes = load_earthquake_data(sources=sources)
+    fetched_at = datetime.now()
+
+    overall_risk = assess_overall_risk(earthquakes, fetched_at)
+
+    with metrics.STAGE_SECONDS.time(stage="prerender"):
+        filtered = filter_earthquakes(
+            earthquakes,
+            DEFAULT_MIN_MAGNITUDE,
+            fetched_at - timedelta(days=DEFAULT_DAYS_BACK),
+            DEFAULT_MAX_DISTANCE,
+        )
+        map_html = render_map_html(build_earthquake_map(filtered, DEFAULT_DISTRICTS))
+        figures = {name: fig.to_json() for name, fig in build_statistics_figures(earthquakes).items()}
+        if overall_risk is not None:
+            figures['gauge'] = build_risk_gauge(overall_risk).to_json()
+
+    return publish_release(data_dir, earthquakes, fetched_at, overall_risk, map_html, figures,
+                           map_filters=DEFAULT_MAP_FILTERS)
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch earthquake catalogs and publish them for the dashboard replicas.")
+    parser.add_argument("--data-dir", default=os.environ.get("DEPREM_DATA_DIR"), help="directory shared with the front-ends")
+    parser.add_argument("--interval", type=float, default=60, help="seconds between refreshes")
+    parser.add_argument("--once", action="store_true", help="publish a single release and exit")
+    parser.add_argument("--kandilli-url", default=KANDILLI_URL)
+    parser.add_argument("--usgs-url", default=USGS_URL)
+    parser.add_argument("--metrics-port", type=int, default=int(os.environ.get("DEPREM_METRICS_PORT", "9109")),
+                        help="port for /metrics (0 disables it)")
+    parser.add_argument("--metrics-host", default=os.environ.get("DEPREM_METRICS_HOST", "127.0.0.1"),
+                        help="address for /metrics (0.0.0.0 for remote scrapers)")
+    args = parser.parse_args()
+    if not args.data_dir:
+        parser.error("--data-dir or DEPREM_DATA_DIR is required")
+
+    if args.metrics_port and not args.once:
+        metrics.start_http_server(args.metrics_port, host=args.metrics_host)
+
+    while True:
+        started = time.monotonic()
+        try:
+            version = run_once(args.data_dir, args.kandilli_url, args.usgs_url)
+            print(f"{datetime.now():%Y-%m-%d %H:%M:%S} published release {version}", flush=True)
+        except Exception as e:
+            # Front-ends keep serving the previous release and show its age and this error;
+            # whatever went wrong, the node stays up and tries again next interval
+            if isinstance(e, UpstreamError):
+                message = str(e)
+            else:
+                message = f"{type(e).__name__}: {e}"
+                traceback.print_exc()
+            print(f"{datetime.now():%Y-%m-%d %H:%M:%S} refresh failed: {message}", flush=True)
+            try:
+                record_failure(args.data_dir, message)
+            except OSError as write_error:
+                print(f"{datetime.now():%Y-%m-%d %H:%M:%S} could not record the failure: {write_error}", flush=True)
+            if args.once:
+                raise SystemExit(1)
+        if args.once:
+            break
+        time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Load test for the horizontally scaled deployment.
+
+Starts a local Kandilli stub, then runs 1..N front-end replica processes that
+each serve many simulated viewer sessions. A session rerun does the per-rerun
+work of app.py outside Streamlit itself (reading the data, sidebar filters,
+alert check, map and figure serialization). Two modes are compared:
+
+    dataplane   an ingest thread (ingest.run_once) keeps publishing releases
+                every --ingest-interval seconds and the replicas only read
+                them (DEPREM_DATA_DIR deployment)
+    standalone  every replica fetches and computes everything itself, like
+                `streamlit run app.py` without DEPREM_DATA_DIR
+
+    python loadtest.py --replicas 1 2 4 --sessions 8 --duration 15
+    python loadtest.py --mode standalone --replicas 1 2
+
+Throughput should grow linearly with replicas as long as there are CPU cores
+for them. The "upstream" column counts requests to the stub during each level:
+in dataplane mode it stays at one per ingest cycle no matter how many replicas
+run, in standalone mode every replica fetches on its own.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import partial
+
+import numpy as np
+import plotly.io as pio
+
+from dataplane import DataPlaneReader
+from ingest import run_once
+from pipeline import (
+    assess_overall_risk,
+    fetch_kandilli_data,
+    filter_earthquakes,
+    find_recent_strong_earthquakes,
+    generate_synthetic_sequence,
+    load_earthquake_data,
+)
+from rendering import (
+    DEFAULT_DAYS_BACK,
+    DEFAULT_DISTRICTS,
+    DEFAULT_MAX_DISTANCE,
+    DEFAULT_MIN_MAGNITUDE,
+    ISTANBUL_DISTRICTS,
+    build_earthquake_map,
+    build_risk_gauge,
+    build_statistics_figures,
+    render_map_html,
+)
+from replay import StubSource
+from resilience import StaleWhileRevalidate
+
+# Viewers rerun the page once per auto-refresh interval (sidebar default)
+REFRESH_INTERVAL = 60
+
+# Function to pick the sidebar values of one rerun; most viewers keep the defaults
+def random_filters(rng, custom_ratio):
+    if rng.random() >= custom_ratio:
+        return {
+            "min_magnitude": DEFAULT_MIN_MAGNITUDE,
+            "max_distance": DEFAULT_MAX_DISTANCE,
+            "days_back": DEFAULT_DAYS_BACK,
+            "districts": DEFAULT_DISTRICTS,
+        }
+    return {
+        "min_magnitude": round(rng.uniform(2.0, 5.0), 1),
+        "max_distance": rng.choice([100, 200, 300, 500, 1000]),
+        "days_back": rng.randint(1, 30),
+        "districts": rng.sample(sorted(ISTANBUL_DISTRICTS), 3),
+    }
+
+# Function to run one front-end replica with `sessions` concurrent viewers and report its reruns
+def run_replica(mode, data_dir, upstream_url, sessions, duration, custom_ratio, seed, ready, results):
+    if mode == "dataplane":
+        reader = DataPlaneReader(data_dir)
+        reader.get()
+    else:
+        loader = partial(load_earthquake_data, sources=(("kandilli", partial(fetch_kandilli_data, url=upstream_url)),))
+        source = StaleWhileRevalidate(loader, max_age=REFRESH_INTERVAL)
+        source.get(wait=60)
+
+    def rerun(rng):
+        now = datetime.now()
+        filters = random_filters(rng, custom_ratio)
+        if mode == "dataplane":
+            release = reader.get()
+            earthquakes = release.events()
+            overall_risk = release.risk
+        else:
+            earthquakes = source.get().data
+            overall_risk = assess_overall_risk(earthquakes, now)
+
+        filtered = filter_earthquakes(
+            earthquakes, filters["min_magnitude"], now - timedelta(days=filters["days_back"]), filters["max_distance"]
+        )
+        find_recent_strong_earthquakes(earthquakes, 4.5, now)
+
+        if mode == "dataplane" and release.map_filters == filters:
+            map_html = release.map_html
+        else:
+            map_html = render_map_html(build_earthquake_map(filtered, filters["districts"]))
+
+        # st.plotly_chart serializes every figure again before sending it to the browser
+        if mode == "dataplane":
+            payload = [pio.from_json(fig).to_json() for fig in release.figures.values()]
+        else:
+            figures = list(build_statistics_figures(earthquakes).values())
+            if overall_risk is not None:
+                figures.append(build_risk_gauge(overall_risk))
+            payload = [fig.to_json() for fig in figures]
+        return len(map_html) + sum(len(p) for p in payload)
+
+    latencies = []
+    lock = threading.Lock()
+
+    def session(index):
+        rng = random.Random(seed * 1000 + index)
+        local = []
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            rerun(rng)
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    ready.wait()
+    deadline = time.monotonic() + duration
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(latencies)
+
+# Function to keep publishing releases from the stub until `stop` is set, like `python ingest.py`
+def run_ingest(data_dir, upstream_url, interval, stop):
+    while not stop.is_set():
+        started = time.monotonic()
+        try:
+            run_once(data_dir, kandilli_url=upstream_url, usgs_url=None)
+        except Exception as e:
+            print(f"ingest: refresh failed: {e}", flush=True)
+        stop.wait(max(0.0, interval - (time.monotonic() - started)))
+
+# Function to run `replicas` replica processes at once and aggregate their results
+def run_level(ctx, mode, replicas, args, data_dir, upstream_url):
+    ready = ctx.Barrier(replicas + 1)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(
+            target=run_replica,
+            args=(mode, data_dir, upstream_url, args.sessions, args.duration, args.custom_ratio, i, ready, results),
+        )
+        for i in range(replicas)
+    ]
+    for process in processes:
+        process.start()
+    ready.wait()
+    started = time.perf_counter()
+    latencies = []
+    for _ in processes:
+        latencies.extend(results.get())
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+
+    values = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "replicas": replicas,
+        "reruns": len(latencies),
+        "reruns_per_s": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test front-end replicas against local stub upstreams.")
+    parser.add_argument("--mode", choices=["dataplane", "standalone"], default="dataplane")
+    parser.add_argument("--replicas", type=int, nargs="+", default=[1, 2, 4], help="replica counts to test")
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent viewer sessions per replica")
+    parser.add_argument("--duration", type=float, default=15, help="seconds per replica count")
+    parser.add_argument("--custom-ratio", type=float, default=0.1,
+                        help="share of reruns with non-default sidebar filters (map rendered locally)")
+    parser.add_argument("--magnitude", type=float, default=7.2, help="synthetic mainshock magnitude")
+    parser.add_argument("--ingest-interval", type=float, default=5, help="seconds between releases in dataplane mode")
+    args = parser.parse_args()
+
+    catalog = generate_synthetic_sequence(args.magnitude, duration_hours=24, seed=1)
+    stub = StubSource(catalog)
+    stub.set_clock(datetime.now())
+    upstream_url = stub.start()
+    data_dir = tempfile.mkdtemp(prefix="deprem-loadtest-")
+    stop_ingest = threading.Event()
+    ingest = None
+
+    try:
+        if args.mode == "dataplane":
+            started = time.perf_counter()
+            version = run_once(data_dir, kandilli_url=upstream_url, usgs_url=None)
+            print(f"ingest: published release {version} in {time.perf_counter() - started:.2f} s")
+            ingest = threading.Thread(
+                target=run_ingest, args=(data_dir, upstream_url, args.ingest_interval, stop_ingest), daemon=True
+            )
+            ingest.start()
+
+        cpus = os.cpu_count() or 1
+        print(f"mode={args.mode} sessions/replica={args.sessions} duration={args.duration:g}s cpus={cpus}")
+        print()
+        print(f"{'replicas':>8}{'reruns/s':>11}{'p50 ms':>9}{'p95 ms':>9}{'scaling':>9}{'viewers':>10}{'upstream':>10}")
+
+        ctx = mp.get_context("spawn")
+        baseline = None
+        for replicas in args.replicas:
+            requests_before = stub.requests
+            result = run_level(ctx, args.mode, replicas, args, data_dir, upstream_url)
+            upstream = stub.requests - requests_before
+            if baseline is None:
+                baseline = result["reruns_per_s"] / replicas
+            scaling = result["reruns_per_s"] / (baseline * replicas) if baseline else 0.0
+            # Each viewer reruns once per refresh interval
+            viewers = result["reruns_per_s"] * REFRESH_INTERVAL
+            print(f"{replicas:>8}{result['reruns_per_s']:>11.1f}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+                  f"{scaling:>8.0%}{viewers:>10.0f}{upstream:>10}")
+    finally:
+        stop_ingest.set()
+        if ingest is not None:
+            ingest.join()
+        stub.stop()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    if max(args.replicas) > cpus:
+        print()
+        print(f"note: more replicas than the {cpus} available CPU core(s); throughput beyond that is CPU bound")
+
+if __name__ == "__main__":
+    main()
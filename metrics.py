@@ -0,0 +1,245 @@
+"""Lightweight in-process metrics with Prometheus text exposition.
+
+Counters and histograms are plain Python objects guarded by a lock, so an
+observation costs a bisect and two additions. The registry can be served
+on `/metrics` from a background thread and summarized for the in-page
+debug panel.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency buckets in seconds, from sub-millisecond parsing to upstream timeouts
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# Monotonic counter, optionally split by labels
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    # Name used in the exposition; counter samples, HELP and TYPE all carry the _total suffix
+    @property
+    def family(self):
+        return f"{self.name}_total"
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            return sorted(self._values.items())
+
+    def expose(self):
+        lines = []
+        for key, value in self.samples():
+            lines.append(f"{self.family}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+# Cumulative histogram with fixed buckets, optionally split by labels
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    @property
+    def family(self):
+        return self.name
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    # Context manager that observes the elapsed wall time of the block
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            return sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+
+    # Approximate quantile from the bucket counts (upper bound of the bucket)
+    @staticmethod
+    def _quantile(buckets, counts, total, q):
+        rank = q * total
+        running = 0
+        for bound, count in zip(buckets + (float("inf"),), counts):
+            running += count
+            if running >= rank:
+                return bound
+        return float("inf")
+
+    def summary(self):
+        rows = []
+        for key, (counts, total_sum, count) in self.samples():
+            rows.append({
+                "labels": dict(zip(self.labelnames, key)),
+                "count": count,
+                "mean": total_sum / count if count else 0.0,
+                "p50": self._quantile(self.buckets, counts, count, 0.5),
+                "p95": self._quantile(self.buckets, counts, count, 0.95),
+            })
+        return rows
+
+    def expose(self):
+        lines = []
+        for key, (counts, total_sum, count) in self.samples():
+            running = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                running += bucket_count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {running}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total_sum)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+# Collection of metrics exposed together
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Streamlit re-executes modules on code changes; reuse the live metric
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    # Render every metric in the Prometheus text exposition format (version 0.0.4)
+    def expose(self):
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.family} {metric.documentation}")
+            lines.append(f"# TYPE {metric.family} {metric.type}")
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+# Pipeline metrics shared by the dashboard, replay and the ingest side
+STAGE_SECONDS = REGISTRY.histogram(
+    "deprem_stage_duration_seconds",
+    "Wall time spent in each pipeline stage.",
+    ["stage"],
+)
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    "deprem_upstream_request_duration_seconds",
+    "Wall time of HTTP requests to upstream catalogs.",
+    ["source"],
+)
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "deprem_upstream_requests",
+    "Requests to upstream catalogs by outcome (ok, http_error, error, circuit_open).",
+    ["source", "outcome"],
+)
+EVENTS_PARSED = REGISTRY.counter(
+    "deprem_events_parsed",
+    "Earthquakes parsed from upstream responses.",
+    ["source"],
+)
+SNAPSHOT_WRITE_FAILURES = REGISTRY.counter(
+    "deprem_snapshot_write_failures",
+    "Catalog snapshots that could not be published to DEPREM_SNAPSHOT_PATH.",
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "deprem_cache_requests",
+    "Cache lookups by result (hit, stale, miss).",
+    ["cache", "result"],
+)
+
+# Decorator that records the wall time of every call as a pipeline stage
+def timed(stage, histogram=STAGE_SECONDS):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, stage=stage)
+        return wrapper
+    return decorator
+
+# Serve the registry on /metrics from a daemon thread, returns the server.
+# Only local scrapers can reach it unless `host` opens it up (e.g. "0.0.0.0").
+def start_http_server(port, host="127.0.0.1", registry=REGISTRY):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.expose().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
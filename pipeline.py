@@ -0,0 +1,367 @@
+import math
+import random
+from datetime import datetime, timedelta
+import numpy as np
+import requests
+from geopy.distance import geodesic
+
+from metrics import EVENTS_PARSED, UPSTREAM_REQUESTS, UPSTREAM_SECONDS, timed
+from resilience import CircuitBreaker, CircuitOpenError, retry_with_backoff
+
+# Define Istanbul coordinates
+ISTANBUL_COORDS = (41.0082, 28.9784)
+
+# Upstream sources
+KANDILLI_URL = "http://www.koeri.boun.edu.tr/scripts/lst9.asp"
+USGS_URL = "https://earthquake.usgs.gov/fdsnws/event/1/query"
+
+# Header printed by Kandilli above the event list (the parser only needs the dashed line)
+KANDILLI_HEADER = """Tarih      Saat      Enlem(N)  Boylam(E) Derinlik(km)  MD   ML   Mw    Yer                                             Cozum Niteligi
+---------- --------  --------  -------   ----------    ------------    --------------                                  --------------
+"""
+
+# Function to calculate risk level for Istanbul based on earthquake parameters
+def calculate_risk_level(magnitude, depth, distance, time_since):
+    # Base risk from magnitude
+    if magnitude >= 7.0:
+        base_risk = 5  # Very High
+    elif magnitude >= 6.0:
+        base_risk = 4  # High
+    elif magnitude >= 5.0:
+        base_risk = 3  # Moderate
+    elif magnitude >= 4.0:
+        base_risk = 2  # Low
+    else:
+        base_risk = 1  # Very Low
+
+    # Adjust for depth (shallow earthquakes are more dangerous)
+    if depth < 10:
+        depth_factor = 1.5
+    elif depth < 30:
+        depth_factor = 1.2
+    elif depth < 50:
+        depth_factor = 1.0
+    else:
+        depth_factor = 0.8
+
+    # Adjust for distance
+    if distance < 50:
+        distance_factor = 1.5
+    elif distance < 100:
+        distance_factor = 1.2
+    elif distance < 200:
+        distance_factor = 0.9
+    else:
+        distance_factor = 0.6
+
+    # Adjust for time (more recent earthquakes might indicate active fault movement)
+    if time_since.total_seconds() < 3600:  # Last hour
+        time_factor = 1.3
+    elif time_since.total_seconds() < 86400:  # Last day
+        time_factor = 1.1
+    elif time_since.total_seconds() < 604800:  # Last week
+        time_factor = 0.9
+    else:
+        time_factor = 0.7
+
+    # Calculate final risk score
+    risk_score = base_risk * depth_factor * distance_factor * time_factor
+
+    # Normalize to 1-5 scale
+    risk_score = max(1, min(5, risk_score))
+
+    return risk_score
+
+# Function to estimate arrival time of seismic waves
+def estimate_arrival_time(distance_km):
+    # P-waves travel at approximately 6-8 km/s
+    p_wave_speed = 7  # km/s
+
+    # S-waves travel at approximately 3-4 km/s
+    s_wave_speed = 3.5  # km/s
+
+    p_wave_time = distance_km / p_wave_speed
+    s_wave_time = distance_km / s_wave_speed
+
+    return p_wave_time, s_wave_time
+
+# Function to parse the plain text event list published by Kandilli Observatory
+@timed("parse_kandilli")
+def parse_kandilli_text(content):
+    lines = content.split('\n')
+
+    # Find where the earthquake data starts (after the header)
+    start_idx = 0
+    for i, line in enumerate(lines):
+        if "-------------" in line:
+            start_idx = i + 1
+            break
+
+    # Parse each earthquake entry
+    earthquakes = []
+    for i in range(start_idx, len(lines)):
+        line = lines[i].strip()
+        if not line:
+            continue
+
+        try:
+            # Format is like: 2023.06.05 12:53:54 40.6877 27.5055 7.0 -.- 3.0 -.- SARKOYMARMARA_DENIZI (CANAKKALE) İlksel
+            parts = line.split()
+            if len(parts) < 9:
+                continue
+
+            date = parts[0]
+            time_str = parts[1]
+            lat = float(parts[2])
+            lon = float(parts[3])
+            depth = float(parts[4])
+            magnitude = float(parts[6])
+
+            # Extract location
+            loc_start = line.find('(')
+            loc_end = line.find(')')
+            if loc_start > 0 and loc_end > loc_start:
+                location = line[loc_start+1:loc_end]
+            else:
+                location = "Unknown"
+
+            # Calculate distance to Istanbul
+            distance_to_istanbul = geodesic((lat, lon), ISTANBUL_COORDS).kilometers
+
+            # Parse datetime
+            dt_str = f"{date} {time_str}"
+            dt = datetime.strptime(dt_str, "%Y.%m.%d %H:%M:%S")
+
+            earthquakes.append({
+                'date': dt,
+                'latitude': lat,
+                'longitude': lon,
+                'depth': depth,
+                'magnitude': magnitude,
+                'location': location,
+                'distance_to_istanbul': distance_to_istanbul
+            })
+        except Exception as e:
+            # Skip entries that can't be parsed
+            continue
+
+    EVENTS_PARSED.inc(len(earthquakes), source="kandilli")
+
+    # Sort by date (newest first)
+    earthquakes.sort(key=lambda x: x['date'], reverse=True)
+    return earthquakes
+
+# Function to format an earthquake as a line of the Kandilli event list
+def format_kandilli_line(eq):
+    return (
+        f"{eq['date'].strftime('%Y.%m.%d %H:%M:%S')}  {eq['latitude']:.4f}   {eq['longitude']:.4f}"
+        f"       {eq['depth']:.1f}      -.-  {eq['magnitude']:.1f}  -.-   REPLAY ({eq['location']})"
+        f"                          İlksel"
+    )
+
+# Function to parse the GeoJSON response of the USGS event service
+@timed("parse_usgs")
+def parse_usgs_geojson(data):
+    earthquakes = []
+    for feature in data['features']:
+        props = feature['properties']
+        coords = feature['geometry']['coordinates']
+
+        # Extract data
+        magnitude = props['mag']
+        dt = datetime.fromtimestamp(props['time'] / 1000)
+        location = props['place']
+        depth = coords[2]
+        longitude = coords[0]
+        latitude = coords[1]
+
+        # Calculate distance to Istanbul
+        distance_to_istanbul = geodesic((latitude, longitude), ISTANBUL_COORDS).kilometers
+
+        earthquakes.append({
+            'date': dt,
+            'latitude': latitude,
+            'longitude': longitude,
+            'depth': depth,
+            'magnitude': magnitude,
+            'location': location,
+            'distance_to_istanbul': distance_to_istanbul
+        })
+
+    EVENTS_PARSED.inc(len(earthquakes), source="usgs")
+
+    # Sort by date (newest first)
+    earthquakes.sort(key=lambda x: x['date'], reverse=True)
+    return earthquakes
+
+class UpstreamError(Exception):
+    pass
+
+# Function to fetch earthquake data from Kandilli Observatory (raises UpstreamError on failure)
+@timed("fetch_kandilli")
+def fetch_kandilli_data(url=KANDILLI_URL, timeout=10):
+    try:
+        with UPSTREAM_SECONDS.time(source="kandilli"):
+            response = requests.get(url, timeout=timeout)
+    except requests.RequestException as e:
+        UPSTREAM_REQUESTS.inc(source="kandilli", outcome="error")
+        raise UpstreamError(f"Error fetching earthquake data: {e}") from e
+
+    if response.status_code != 200:
+        UPSTREAM_REQUESTS.inc(source="kandilli", outcome="http_error")
+        raise UpstreamError(f"Failed to fetch data from Kandilli Observatory (HTTP {response.status_code}).")
+
+    UPSTREAM_REQUESTS.inc(source="kandilli", outcome="ok")
+    # Parse the text response (custom format from Kandilli)
+    return parse_kandilli_text(response.text)
+
+# Alternative function to fetch from USGS if Kandilli fails (raises UpstreamError on failure)
+@timed("fetch_usgs")
+def fetch_usgs_data(url=USGS_URL, timeout=10):
+    # Get earthquakes from the past 30 days with magnitude > 2.5 near Turkey
+    params = {
+        "format": "geojson",
+        "starttime": (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d"),
+        "endtime": datetime.now().strftime("%Y-%m-%d"),
+        "minmagnitude": 2.5,
+        "latitude": ISTANBUL_COORDS[0],
+        "longitude": ISTANBUL_COORDS[1],
+        "maxradiuskm": 500
+    }
+
+    try:
+        with UPSTREAM_SECONDS.time(source="usgs"):
+            response = requests.get(url, params=params, timeout=timeout)
+    except requests.RequestException as e:
+        UPSTREAM_REQUESTS.inc(source="usgs", outcome="error")
+        raise UpstreamError(f"Error fetching USGS earthquake data: {e}") from e
+
+    if response.status_code != 200:
+        UPSTREAM_REQUESTS.inc(source="usgs", outcome="http_error")
+        raise UpstreamError(f"Failed to fetch data from USGS (HTTP {response.status_code}).")
+
+    UPSTREAM_REQUESTS.inc(source="usgs", outcome="ok")
+    try:
+        return parse_usgs_geojson(response.json())
+    except (ValueError, KeyError, TypeError) as e:
+        raise UpstreamError(f"Invalid USGS response: {e}") from e
+
+# One circuit breaker per upstream, shared by every caller in the process
+BREAKERS = {
+    "kandilli": CircuitBreaker("kandilli"),
+    "usgs": CircuitBreaker("usgs"),
+}
+
+# Function to get earthquake data (tries Kandilli first, falls back to USGS).
+# Each source is retried with backoff behind its circuit breaker; raises UpstreamError
+# with every source's failure when none of them returns data.
+def load_earthquake_data(sources=None, breakers=BREAKERS, attempts=3):
+    if sources is None:
+        sources = (("kandilli", fetch_kandilli_data), ("usgs", fetch_usgs_data))
+
+    errors = []
+    for name, fetch in sources:
+        try:
+            earthquakes = breakers[name].call(retry_with_backoff, fetch, attempts=attempts, retry_on=(UpstreamError,))
+        except CircuitOpenError as e:
+            UPSTREAM_REQUESTS.inc(source=name, outcome="circuit_open")
+            errors.append(str(e))
+            continue
+        except UpstreamError as e:
+            errors.append(str(e))
+            continue
+        if earthquakes:
+            return earthquakes
+        errors.append(f"{name} returned no earthquakes")
+
+    raise UpstreamError("; ".join(errors))
+
+# Function to apply the sidebar filters to a list of earthquakes
+@timed("filter")
+def filter_earthquakes(earthquakes, min_magnitude, min_date, max_distance):
+    return [
+        eq for eq in earthquakes
+        if eq['magnitude'] >= min_magnitude
+        and eq['date'] >= min_date
+        and eq['distance_to_istanbul'] <= max_distance
+    ]
+
+# Function to find strong earthquakes near Istanbul in the last 24 hours
+@timed("alert")
+def find_recent_strong_earthquakes(earthquakes, notification_threshold, now, max_distance=300):
+    return [
+        eq for eq in earthquakes
+        if eq['magnitude'] >= notification_threshold
+        and (now - eq['date']).total_seconds() < 3600 * 24  # Last 24 hours
+        and eq['distance_to_istanbul'] <= max_distance  # Within 300km of Istanbul
+    ]
+
+# Function to calculate the overall risk for Istanbul (None if there is not enough data)
+@timed("risk")
+def assess_overall_risk(earthquakes, now):
+    risk_scores = []
+    for eq in earthquakes[:50]:  # Consider the 50 most recent earthquakes
+        time_since = now - eq['date']
+        if time_since.total_seconds() <= 604800:  # Last week
+            risk = calculate_risk_level(
+                eq['magnitude'],
+                eq['depth'],
+                eq['distance_to_istanbul'],
+                time_since
+            )
+            risk_scores.append(risk)
+
+    if not risk_scores:
+        return None
+    return np.mean(risk_scores)
+
+# Function to generate a synthetic Marmara aftershock sequence for replay and load tests.
+# Aftershock times follow the modified Omori law, magnitudes follow Gutenberg-Richter
+# and the largest aftershock is about 1.2 units below the mainshock (Båth's law).
+def generate_synthetic_sequence(mainshock_magnitude=7.2, start=None, duration_hours=72,
+                                min_magnitude=2.0, b_value=1.0, omori_p=1.1, omori_c=0.05,
+                                epicenter=(40.85, 28.35), seed=None):
+    rng = random.Random(seed)
+    if start is None:
+        start = datetime.now().replace(microsecond=0) - timedelta(hours=duration_hours)
+
+    earthquakes = [{
+        'date': start,
+        'latitude': epicenter[0],
+        'longitude': epicenter[1],
+        'depth': 12.0,
+        'magnitude': mainshock_magnitude,
+        'location': "SILIVRI-ISTANBUL",
+    }]
+
+    count = int(10 ** (b_value * (mainshock_magnitude - 1.2 - min_magnitude)))
+
+    # Inverse CDF of the Omori rate K / (t + c)^p on [0, duration]; p == 1 integrates to a logarithm
+    q = 1 - omori_p
+    if q == 0:
+        ratio = (duration_hours + omori_c) / omori_c
+    else:
+        low = omori_c ** q
+        high = (duration_hours + omori_c) ** q
+    for _ in range(count):
+        u = rng.random()
+        if q == 0:
+            hours = omori_c * ratio ** u - omori_c
+        else:
+            hours = (low + u * (high - low)) ** (1 / q) - omori_c
+        magnitude = min_magnitude - math.log10(1 - rng.random()) / b_value
+        earthquakes.append({
+            'date': start + timedelta(seconds=int(hours * 3600) + 1),
+            'latitude': epicenter[0] + rng.gauss(0, 0.08),
+            'longitude': epicenter[1] + rng.gauss(0, 0.35),
+            'depth': min(30.0, max(2.0, rng.gauss(11, 4))),
+            'magnitude': round(min(magnitude, mainshock_magnitude - 0.1), 1),
+            'location': "SILIVRI-ISTANBUL",
+        })
+
+    for eq in earthquakes:
+        eq['distance_to_istanbul'] = geodesic((eq['latitude'], eq['longitude']), ISTANBUL_COORDS).kilometers
+
+    # Sort by date (newest first)
+    earthquakes.sort(key=lambda x: x['date'], reverse=True)
+    return earthquakes
@@ -0,0 +1,212 @@
+import folium
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from pipeline import ISTANBUL_COORDS
+
+# Define target cities and their coordinates
+TARGET_CITIES = {
+    "İstanbul": (41.0082, 28.9784),
+    "Kocaeli": (40.7654, 29.9408),
+    "Tekirdağ": (40.9781, 27.5126),
+    "Sakarya": (40.7731, 30.3925),
+    "Yalova": (40.6550, 29.2774),
+    "Bursa": (40.1885, 29.0610)
+}
+
+# Istanbul districts and their coordinates
+ISTANBUL_DISTRICTS = {
+    "Adalar": (40.8760, 29.0878),
+    "Arnavutköy": (41.1839, 28.7419),
+    "Ataşehir": (40.9830, 29.1291),
+    "Avcılar": (41.0204, 28.7187),
+    "Bağcılar": (41.0378, 28.8500),
+    "Bahçelievler": (41.0021, 28.8577),
+    "Bakırköy": (40.9817, 28.8773),
+    "Başakşehir": (41.0931, 28.8026),
+    "Bayrampaşa": (41.0467, 28.8967),
+    "Beşiktaş": (41.0434, 29.0086),
+    "Beykoz": (41.1473, 29.0988),
+    "Beylikdüzü": (41.0103, 28.6428),
+    "Beyoğlu": (41.0366, 28.9735),
+    "Büyükçekmece": (41.0195, 28.5933),
+    "Çatalca": (41.1426, 28.4515),
+    "Çekmeköy": (41.0330, 29.1872),
+    "Esenler": (41.0437, 28.8763),
+    "Esenyurt": (41.0290, 28.6728),
+    "Eyüp": (41.0478, 28.9339),
+    "Fatih": (41.0187, 28.9394),
+    "Gaziosmanpaşa": (41.0680, 28.9097),
+    "Güngören": (41.0178, 28.8898),
+    "Kadıköy": (40.9926, 29.0233),
+    "Kağıthane": (41.0784, 28.9833),
+    "Kartal": (40.8884, 29.1872),
+    "Küçükçekmece": (41.0015, 28.7981),
+    "Maltepe": (40.9351, 29.1362),
+    "Pendik": (40.8750, 29.2583),
+    "Sancaktepe": (41.0006, 29.2266),
+    "Sarıyer": (41.1693, 29.0557),
+    "Silivri": (41.0731, 28.2464),
+    "Sultanbeyli": (40.9650, 29.2652),
+    "Sultangazi": (41.1066, 28.8679),
+    "Şile": (41.1748, 29.6119),
+    "Şişli": (41.0603, 28.9868),
+    "Tuzla": (40.8156, 29.3009),
+    "Ümraniye": (41.0161, 29.0964),
+    "Üsküdar": (41.0284, 29.0258),
+    "Zeytinburnu": (41.0070, 28.9000)
+}
+
+# Sidebar defaults; the ingest node prerenders the map for exactly these filters
+DEFAULT_MIN_MAGNITUDE = 3.0
+DEFAULT_MAX_DISTANCE = 500
+DEFAULT_DAYS_BACK = 7
+DEFAULT_DISTRICTS = ["Kadıköy", "Fatih", "Beşiktaş", "Üsküdar"]
+
+# Size of the embedded map (same as folium_static)
+MAP_WIDTH = 700
+MAP_HEIGHT = 500
+
+# Function to build the earthquake map centered on Istanbul
+def build_earthquake_map(filtered_earthquakes, selected_districts):
+    # Create a map centered on Istanbul
+    m = folium.Map(location=ISTANBUL_COORDS, zoom_start=7)
+
+    # Add markers for filtered earthquakes
+    for eq in filtered_earthquakes:
+        # Determine color based on magnitude
+        if eq['magnitude'] >= 5.0:
+            color = 'red'
+        elif eq['magnitude'] >= 4.0:
+            color = 'orange'
+        else:
+            color = 'green'
+
+        # Create popup content
+        popup_content = f"""
+        <strong>Tarih:</strong> {eq['date'].strftime('%d.%m.%Y %H:%M:%S')}<br>
+        <strong>Büyüklük:</strong> {eq['magnitude']:.1f}<br>
+        <strong>Derinlik:</strong> {eq['depth']} km<br>
+        <strong>Konum:</strong> {eq['location']}<br>
+        <strong>İstanbul'a uzaklık:</strong> {eq['distance_to_istanbul']:.1f} km
+        """
+
+        # Add marker
+        folium.CircleMarker(
+            location=[eq['latitude'], eq['longitude']],
+            radius=eq['magnitude'] * 2,  # Size based on magnitude
+            color=color,
+            fill=True,
+            fill_opacity=0.7,
+            popup=folium.Popup(popup_content, max_width=300)
+        ).add_to(m)
+
+    # Add markers for target cities
+    for city, coords in TARGET_CITIES.items():
+        folium.Marker(
+            location=coords,
+            popup=city,
+            icon=folium.Icon(color='blue', icon='info-sign')
+        ).add_to(m)
+
+    # Add markers for selected Istanbul districts
+    for district in selected_districts:
+        if district in ISTANBUL_DISTRICTS:
+            folium.Marker(
+                location=ISTANBUL_DISTRICTS[district],
+                popup=f"İstanbul - {district}",
+                icon=folium.Icon(color='purple', icon='home')
+            ).add_to(m)
+
+    return m
+
+# Function to serialize a folium map to a standalone HTML page
+def render_map_html(m):
+    return m.get_root().render()
+
+# Function to build the risk meter for the overall risk score
+def build_risk_gauge(overall_risk):
+    return go.Figure(go.Indicator(
+        mode = "gauge+number+delta",
+        value = overall_risk,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': "Risk Seviyesi"},
+        gauge = {
+            'axis': {'range': [0, 5], 'tickwidth': 1},
+            'bar': {'color': "darkblue"},
+            'bgcolor': "white",
+            'borderwidth': 2,
+            'bordercolor': "gray",
+            'steps': [
+                {'range': [0, 1], 'color': '#2ECC71'},
+                {'range': [1, 2], 'color': '#82E0AA'},
+                {'range': [2, 3], 'color': '#F7DC6F'},
+                {'range': [3, 4], 'color': '#F5B041'},
+                {'range': [4, 5], 'color': '#E74C3C'}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 4
+            }
+        }
+    ))
+
+# Function to build the statistics tab figures (empty dict if there is no data)
+def build_statistics_figures(earthquakes):
+    # Convert to dataframe for analysis
+    df = pd.DataFrame(earthquakes)
+    if df.empty:
+        return {}
+
+    figures = {}
+
+    # Magnitude distribution
+    figures['magnitude'] = px.histogram(
+        df,
+        x="magnitude",
+        nbins=20,
+        title="Deprem Büyüklük Dağılımı",
+        color_discrete_sequence=['#3498DB']
+    )
+
+    # Depth distribution
+    figures['depth'] = px.histogram(
+        df,
+        x="depth",
+        nbins=20,
+        title="Deprem Derinlik Dağılımı",
+        color_discrete_sequence=['#2ECC71']
+    )
+
+    # Time series of earthquakes
+    if 'date' in df.columns:
+        daily = df.copy()
+        daily['date'] = pd.to_datetime(daily['date'])
+        daily.set_index('date', inplace=True)
+
+        # Resample by day and count
+        daily_counts = daily.resample('D').size()
+
+        figures['daily'] = px.line(
+            daily_counts,
+            title="Günlük Deprem Sayısı",
+            labels={'value': 'Deprem Sayısı', 'date': 'Tarih'}
+        )
+
+    # Magnitude vs. Depth scatter plot
+    fig = px.scatter(
+        df,
+        x="magnitude",
+        y="depth",
+        title="Büyüklük ve Derinlik İlişkisi",
+        labels={'magnitude': 'Büyüklük', 'depth': 'Derinlik (km)'},
+        color="magnitude",
+        size="magnitude",
+        color_continuous_scale=px.colors.sequential.Plasma
+    )
+    fig.update_yaxes(autorange="reversed")  # Reverse y-axis so smaller depth values are at the top
+    figures['scatter'] = fig
+
+    return figures
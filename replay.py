@@ -0,0 +1,269 @@
+"""Replay a recorded or synthetic earthquake catalog through the warning pipeline.
+
+The catalog is served by a local stub of the Kandilli event list whose clock
+runs at a configurable speed-up. Every poll goes through the same code as the
+dashboard (load_earthquake_data with its breaker, timeout and metrics, then
+risk and alert), and the per-stage latency and throughput are reported at
+the end.
+
+    python replay.py --synthetic --speedup 1000
+    python replay.py --catalog lst9.txt --speedup 60 --json
+"""
+import argparse
+import bisect
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from metrics import STAGE_SECONDS
+from pipeline import (
+    KANDILLI_HEADER,
+    UpstreamError,
+    assess_overall_risk,
+    estimate_arrival_time,
+    fetch_kandilli_data,
+    find_recent_strong_earthquakes,
+    format_kandilli_line,
+    generate_synthetic_sequence,
+    load_earthquake_data,
+    parse_kandilli_text,
+    parse_usgs_geojson,
+)
+from resilience import CircuitBreaker
+
+# "fetch" is the upstream request of load_earthquake_data, "parse" the parsing inside it
+STAGES = ("fetch", "parse", "risk", "alert")
+
+# Kandilli event list stub that only shows the events before the simulated clock
+class StubSource:
+    def __init__(self, catalog, window=500):
+        # Oldest first so the visible prefix can be found by bisection
+        self.catalog = sorted(catalog, key=lambda x: x['date'])
+        self.dates = [eq['date'] for eq in self.catalog]
+        self.window = window
+        self.now = self.dates[0] if self.dates else datetime.now()
+        self.lock = threading.Lock()
+        self.server = None
+        self.requests = 0
+
+    def set_clock(self, now):
+        with self.lock:
+            self.now = now
+
+    # Render the event list the way lst9.asp does (newest first, last `window` events)
+    def render(self):
+        with self.lock:
+            now = self.now
+        end = bisect.bisect_right(self.dates, now)
+        visible = self.catalog[max(0, end - self.window):end]
+        return KANDILLI_HEADER + "\n".join(format_kandilli_line(eq) for eq in reversed(visible)) + "\n"
+
+    def start(self, host="127.0.0.1", port=0):
+        source = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with source.lock:
+                    source.requests += 1
+                body = source.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self.server.server_address[1]}/scripts/lst9.asp"
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+# Function to load a catalog saved from Kandilli (lst9.asp text) or USGS (GeoJSON)
+def load_catalog(path):
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    if path.endswith(".json") or path.endswith(".geojson"):
+        return parse_usgs_geojson(json.loads(content))
+    return parse_kandilli_text(content)
+
+# Function to read the total time recorded so far for a pipeline stage
+def _stage_seconds(stage):
+    for key, (_, total, _) in STAGE_SECONDS.samples():
+        if key == (stage,):
+            return total
+    return 0.0
+
+# Function to summarize a list of latencies (seconds) in milliseconds
+def summarize(samples):
+    if not samples:
+        return {"count": 0}
+    values = np.array(samples) * 1000
+    return {
+        "count": len(samples),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+# Function to run the replay and collect per-stage timings
+def run_replay(catalog, speedup=100.0, poll_interval=60, notification_threshold=4.5,
+               window=500, timeout=10, on_alert=None):
+    if not catalog:
+        raise ValueError("catalog is empty")
+    if not 1 <= speedup <= 1000:
+        raise ValueError("speedup must be between 1 and 1000")
+
+    source = StubSource(catalog, window=window)
+    url = source.start()
+    # Same load path as the dashboard, with a breaker of its own so the app's breakers are untouched
+    sources = (("kandilli", partial(fetch_kandilli_data, url=url, timeout=timeout)),)
+    breakers = {"kandilli": CircuitBreaker("kandilli")}
+    earthquakes = []
+    alerted = set()
+
+    timings = {stage: [] for stage in STAGES}
+    parsed_events = 0
+    alerts = 0
+    failed_ticks = 0
+    late_ticks = 0
+
+    sim_now = source.dates[0]
+    sim_end = source.dates[-1] + timedelta(seconds=poll_interval)
+    tick_real = poll_interval / speedup
+    started = time.perf_counter()
+    next_tick = started
+
+    try:
+        while sim_now <= sim_end:
+            source.set_clock(sim_now)
+
+            parse_before = _stage_seconds("parse_kandilli")
+            t0 = time.perf_counter()
+            try:
+                earthquakes = load_earthquake_data(sources=sources, breakers=breakers, attempts=1)
+                parsed_events += len(earthquakes)
+            except UpstreamError:
+                # The dashboard keeps serving the previous list
+                failed_ticks += 1
+            t1 = time.perf_counter()
+            parse_seconds = _stage_seconds("parse_kandilli") - parse_before
+            assess_overall_risk(earthquakes, sim_now)
+            t2 = time.perf_counter()
+            for eq in find_recent_strong_earthquakes(earthquakes, notification_threshold, sim_now):
+                key = (eq['date'], eq['latitude'], eq['longitude'])
+                if key in alerted:
+                    continue
+                alerted.add(key)
+                alerts += 1
+                if on_alert is not None:
+                    on_alert(sim_now, eq, estimate_arrival_time(eq['distance_to_istanbul']))
+            t3 = time.perf_counter()
+
+            timings["fetch"].append(t1 - t0 - parse_seconds)
+            timings["parse"].append(parse_seconds)
+            timings["risk"].append(t2 - t1)
+            timings["alert"].append(t3 - t2)
+
+            # Keep the simulated clock locked to wall time; count ticks we could not keep up with
+            next_tick += tick_real
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                late_ticks += 1
+            sim_now += timedelta(seconds=poll_interval)
+    finally:
+        source.stop()
+
+    elapsed = time.perf_counter() - started
+    ticks = len(timings["fetch"])
+    pipeline_total = [sum(stage_times) for stage_times in zip(*timings.values())]
+    return {
+        "catalog_events": len(catalog),
+        "ticks": ticks,
+        "late_ticks": late_ticks,
+        "failed_ticks": failed_ticks,
+        "alerts": alerts,
+        "speedup": speedup,
+        "elapsed_s": elapsed,
+        "ticks_per_s": ticks / elapsed if elapsed else 0.0,
+        "parsed_events_per_s": parsed_events / sum(timings["parse"]) if timings["parse"] else 0.0,
+        "stages": {stage: summarize(timings[stage]) for stage in STAGES},
+        "pipeline": summarize(pipeline_total),
+        # Busy fraction of one worker at this speed-up; above 1.0 the pipeline falls behind
+        "utilization": sum(pipeline_total) / elapsed if elapsed else 0.0,
+    }
+
+# Function to print the replay report as a table
+def print_report(report):
+    print(f"catalog events : {report['catalog_events']}")
+    print(f"ticks          : {report['ticks']} ({report['late_ticks']} late, {report['failed_ticks']} failed) "
+          f"at {report['speedup']:g}x")
+    print(f"alerts         : {report['alerts']}")
+    print(f"elapsed        : {report['elapsed_s']:.2f} s ({report['ticks_per_s']:.1f} ticks/s)")
+    print(f"parse rate     : {report['parsed_events_per_s']:.0f} events/s")
+    print(f"utilization    : {report['utilization']:.1%}")
+    print()
+    print(f"{'stage':<10}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    for name, stats in list(report["stages"].items()) + [("total", report["pipeline"])]:
+        if not stats["count"]:
+            continue
+        print(f"{name:<10}{stats['mean_ms']:>10.2f}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+              f"{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay an earthquake catalog through the warning pipeline.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--catalog", help="Kandilli lst9.asp text file or USGS GeoJSON file")
+    source.add_argument("--synthetic", action="store_true", help="generate a Marmara aftershock sequence")
+    parser.add_argument("--magnitude", type=float, default=7.2, help="synthetic mainshock magnitude")
+    parser.add_argument("--hours", type=float, default=24, help="synthetic sequence duration in hours")
+    parser.add_argument("--seed", type=int, default=None, help="synthetic sequence random seed")
+    parser.add_argument("--speedup", type=float, default=100.0, help="replay speed-up (1-1000)")
+    parser.add_argument("--poll-interval", type=int, default=60, help="simulated seconds between polls")
+    parser.add_argument("--window", type=int, default=500, help="events shown by the stub event list")
+    parser.add_argument("--threshold", type=float, default=4.5, help="alert magnitude threshold")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--quiet", action="store_true", help="do not print alerts as they fire")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        start = datetime.now().replace(microsecond=0) - timedelta(hours=args.hours)
+        catalog = generate_synthetic_sequence(args.magnitude, start=start, duration_hours=args.hours, seed=args.seed)
+    else:
+        catalog = load_catalog(args.catalog)
+
+    def on_alert(sim_now, eq, arrival):
+        if args.quiet or args.json:
+            return
+        print(f"[{sim_now:%Y-%m-%d %H:%M:%S}] ALERT M{eq['magnitude']:.1f} {eq['location']} "
+              f"{eq['distance_to_istanbul']:.1f} km, P ~{arrival[0]:.1f} s, S ~{arrival[1]:.1f} s")
+
+    report = run_replay(
+        catalog,
+        speedup=args.speedup,
+        poll_interval=args.poll_interval,
+        notification_threshold=args.threshold,
+        window=args.window,
+        on_alert=on_alert,
+    )
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+if __name__ == "__main__":
+    main()
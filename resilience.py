@@ -0,0 +1,171 @@
+"""Failure handling for upstream catalogs.
+
+`CircuitBreaker` stops calling a source that keeps failing, `retry_with_backoff`
+retries transient errors with jittered exponential backoff and
+`StaleWhileRevalidate` keeps serving the last good snapshot while a
+background thread refreshes it, so a slow or failing upstream never blocks
+a page render.
+"""
+import random
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+class CircuitOpenError(Exception):
+    pass
+
+# Per-source circuit breaker (closed -> open after repeated failures -> half-open trial)
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=60, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    # Reserve a call; only one trial call goes through while half-open
+    def _acquire(self):
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._trial_running = False
+
+    def call(self, func, *args, **kwargs):
+        if not self._acquire():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+# Function to call `func` until it succeeds, sleeping a random "full jitter" delay between attempts
+def retry_with_backoff(func, attempts=3, base_delay=0.5, max_delay=8.0, retry_on=(Exception,),
+                       sleep=time.sleep, rng=random):
+    for attempt in range(attempts):
+        try:
+            return func()
+        except CircuitOpenError:
+            raise
+        except retry_on:
+            if attempt == attempts - 1:
+                raise
+            sleep(rng.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+# What a reader gets back: the last good data (None before the first success), when it was
+# fetched, the error of the latest failed refresh and whether a refresh is running
+Snapshot = namedtuple("Snapshot", ["data", "fetched_at", "error", "refreshing"])
+
+# Serve the last good result immediately and refresh it in a background thread once it is older than max_age
+class StaleWhileRevalidate:
+    def __init__(self, loader, max_age=60, retry_interval=None, clock=datetime.now):
+        self.loader = loader
+        self.max_age = max_age
+        self.clock = clock
+        # How long to wait after a failed refresh before trying again
+        self.retry_interval = max_age if retry_interval is None else retry_interval
+        self._data = None
+        self._fetched_at = None
+        self._error = None
+        self._attempted_at = None
+        self._thread = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def _is_newer(self, fetched_at):
+        return self._fetched_at is None or fetched_at > self._fetched_at
+
+    # Seed the cache with previously saved data (e.g. a snapshot from disk). `data` may be a
+    # callable that builds it; it is only called when the data is newer than what is cached.
+    def prime(self, data, fetched_at):
+        if callable(data):
+            with self._lock:
+                if not self._is_newer(fetched_at):
+                    return
+            data = data()
+        with self._lock:
+            if self._is_newer(fetched_at):
+                self._data = data
+                self._fetched_at = fetched_at
+                # The adopted data is newer than whatever refresh failed before
+                self._error = None
+
+    def _refresh(self):
+        try:
+            data = self.loader()
+        except Exception as e:
+            with self._lock:
+                self._error = e
+        else:
+            with self._lock:
+                self._data = data
+                self._fetched_at = self.clock()
+                self._error = None
+        finally:
+            with self._lock:
+                self._thread = None
+            self._done.set()
+
+    def _needs_refresh(self, now):
+        if self._thread is not None:
+            return False
+        if self._attempted_at is not None and (now - self._attempted_at).total_seconds() < self.retry_interval:
+            return False
+        return self._fetched_at is None or (now - self._fetched_at).total_seconds() >= self.max_age
+
+    # Return the current snapshot, starting a refresh if it is stale. `wait` bounds how long
+    # a caller without any data is willing to block for the first load.
+    def get(self, wait=0):
+        now = self.clock()
+        with self._lock:
+            if self._needs_refresh(now):
+                self._attempted_at = now
+                self._done.clear()
+                self._thread = threading.Thread(target=self._refresh, name="stale-while-revalidate", daemon=True)
+                self._thread.start()
+            has_data = self._fetched_at is not None
+
+        if not has_data and wait:
+            self._done.wait(wait)
+
+        with self._lock:
+            return Snapshot(self._data, self._fetched_at, self._error, self._thread is not None)
@@ -0,0 +1,174 @@
+"""Versioned, memory-mappable binary snapshot of the earthquake catalog.
+
+Layout (little-endian, every section 8-byte aligned):
+
+    header    32 bytes  magic b"DPRM", format version (u16), flags (u16),
+                        event count (u32), fetched_at (i64, microseconds
+                        since 1970-01-01 naive local time), location blob
+                        size (u64)
+    date      i64[n]    origin time, same unit as fetched_at
+    latitude  f8[n]
+    longitude f8[n]
+    depth     f8[n]
+    magnitude f8[n]
+    distance  f8[n]     distance to Istanbul in km
+    offsets   u32[n+1]  start of each location in the blob
+    locations utf-8 blob
+
+Writers replace the file atomically, so readers that mmap it read-only never
+see a partial snapshot. The raw columns live in the page cache shared by every
+process on the host; `CatalogSnapshot.events()` still builds a per-process
+list of dicts for the dashboard, once per snapshot.
+"""
+import mmap
+import os
+import struct
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from metrics import timed
+
+MAGIC = b"DPRM"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIqQ4x")
+EPOCH = datetime(1970, 1, 1)
+
+FLOAT_COLUMNS = ("latitude", "longitude", "depth", "magnitude", "distance_to_istanbul")
+
+class SnapshotError(Exception):
+    pass
+
+def _to_micros(dt):
+    return (dt - EPOCH) // timedelta(microseconds=1)
+
+def _from_micros(value):
+    return EPOCH + timedelta(microseconds=int(value))
+
+def _padded(size):
+    return (size + 7) & ~7
+
+# Function to write earthquakes (newest first) to `path` atomically
+@timed("snapshot_write")
+def write_snapshot(path, earthquakes, fetched_at):
+    count = len(earthquakes)
+    # USGS reports some events without a place name
+    encoded = [(eq['location'] or "").encode("utf-8") for eq in earthquakes]
+    offsets = np.zeros(count + 1, dtype="<u4")
+    if count:
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+    blob = b"".join(encoded)
+
+    sections = [np.array([_to_micros(eq['date']) for eq in earthquakes], dtype="<i8").tobytes()]
+    for column in FLOAT_COLUMNS:
+        sections.append(np.array([eq[column] for eq in earthquakes], dtype="<f8").tobytes())
+    sections.append(offsets.tobytes())
+    sections.append(blob)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, count, _to_micros(fetched_at), len(blob)))
+            for section in sections:
+                f.write(section)
+                f.write(b"\0" * (_padded(len(section)) - len(section)))
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file private to this user; workers may run as another user
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+# Read-only view of a snapshot file; columns are numpy arrays backed by the mapping
+class CatalogSnapshot:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._stat = os.fstat(f.fileno())
+            if self._stat.st_size < HEADER.size:
+                raise SnapshotError(f"{path} is too small to be a snapshot")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _flags, count, fetched_at, blob_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} is not a catalog snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"{path} has unsupported snapshot version {version}")
+
+        expected = HEADER.size + _padded(8 * count) * 6 + _padded(4 * (count + 1)) + blob_size
+        if self._stat.st_size < expected:
+            raise SnapshotError(f"{path} is truncated")
+
+        self.path = path
+        self.count = count
+        self.fetched_at = _from_micros(fetched_at)
+        self._events = None
+
+        offset = HEADER.size
+        self.dates = np.frombuffer(self._mmap, dtype="<i8", count=count, offset=offset)
+        offset += _padded(8 * count)
+        self.columns = {}
+        for column in FLOAT_COLUMNS:
+            self.columns[column] = np.frombuffer(self._mmap, dtype="<f8", count=count, offset=offset)
+            offset += _padded(8 * count)
+        self.offsets = np.frombuffer(self._mmap, dtype="<u4", count=count + 1, offset=offset)
+        offset += _padded(4 * (count + 1))
+        self._blob_offset = offset
+
+    def __len__(self):
+        return self.count
+
+    # Identity of the file on disk, changes whenever a writer replaces it
+    @property
+    def version(self):
+        return (self._stat.st_ino, self._stat.st_mtime_ns, self._stat.st_size)
+
+    def location(self, index):
+        start = self._blob_offset + int(self.offsets[index])
+        end = self._blob_offset + int(self.offsets[index + 1])
+        return self._mmap[start:end].decode("utf-8")
+
+    # Earthquakes as the list of dicts used by the dashboard (built once per snapshot)
+    @timed("snapshot_materialize")
+    def events(self):
+        if self._events is None:
+            dates = self.dates.tolist()
+            columns = {name: values.tolist() for name, values in self.columns.items()}
+            self._events = [
+                {
+                    'date': _from_micros(dates[i]),
+                    'latitude': columns['latitude'][i],
+                    'longitude': columns['longitude'][i],
+                    'depth': columns['depth'][i],
+                    'magnitude': columns['magnitude'][i],
+                    'location': self.location(i),
+                    'distance_to_istanbul': columns['distance_to_istanbul'][i],
+                }
+                for i in range(self.count)
+            ]
+        return self._events
+
+# Keeps the newest snapshot at `path` mapped, reopening it only after a writer replaced the file
+class SnapshotReader:
+    def __init__(self, path):
+        self.path = path
+        self._snapshot = None
+
+    def get(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return self._snapshot
+        current = self._snapshot
+        if current is None or current.version != (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+            try:
+                self._snapshot = CatalogSnapshot(self.path)
+            except (OSError, SnapshotError):
+                # Keep serving the previous mapping if the new file cannot be read
+                return current
+        return self._snapshot
@@ -0,0 +1,116 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import ingest
+from dataplane import DataPlaneReader, publish_release, read_manifest, record_failure
+
+FETCHED_AT = datetime(2025, 4, 23, 12, 50, 0)
+
+def make_events(count=3):
+    return [
+        {
+            'date': FETCHED_AT - timedelta(minutes=i),
+            'latitude': 40.86,
+            'longitude': 28.21,
+            'depth': 7.0,
+            'magnitude': 4.0 + i / 10,
+            'location': f"EVENT {i}",
+            'distance_to_istanbul': 60.0 + i,
+        }
+        for i in range(count)
+    ]
+
+def publish(data_dir, count=3, fetched_at=FETCHED_AT, keep=3):
+    return publish_release(str(data_dir), make_events(count), fetched_at, 0.4, f"<html>{count}</html>",
+                           {"magnitude": '{"data": []}'}, map_filters={"days_back": 7}, keep=keep)
+
+def releases(data_dir):
+    return sorted(d for d in os.listdir(data_dir) if d.startswith("v"))
+
+def test_publish_release_writes_manifest_and_files(tmp_path):
+    assert read_manifest(str(tmp_path)) is None
+    assert publish(tmp_path) == 1
+    assert publish(tmp_path, count=2) == 2
+
+    manifest = read_manifest(str(tmp_path))
+    assert manifest["version"] == 2
+    assert manifest["event_count"] == 2
+    assert manifest["error"] is None
+    assert manifest["files"]["map"] == "v00000002/map.html"
+    assert releases(tmp_path) == ["v00000001", "v00000002"]
+
+def test_publish_release_prunes_old_releases(tmp_path):
+    for _ in range(5):
+        publish(tmp_path, keep=3)
+    assert releases(tmp_path) == ["v00000003", "v00000004", "v00000005"]
+
+def test_reader_follows_new_versions(tmp_path):
+    reader = DataPlaneReader(str(tmp_path))
+    assert reader.get() is None
+
+    publish(tmp_path)
+    first = reader.get()
+    assert first.version == 1
+    assert first.fetched_at == FETCHED_AT
+    assert first.risk == 0.4
+    assert first.map_html == "<html>3</html>"
+    assert first.map_filters == {"days_back": 7}
+    assert first.figures == {"magnitude": '{"data": []}'}
+    assert [eq['location'] for eq in first.events()] == ["EVENT 0", "EVENT 1", "EVENT 2"]
+    assert reader.get() is first
+
+    publish(tmp_path, count=1, fetched_at=FETCHED_AT + timedelta(minutes=1))
+    second = reader.get()
+    assert second.version == 2
+    assert len(second.events()) == 1
+
+def test_release_survives_pruning(tmp_path):
+    reader = DataPlaneReader(str(tmp_path))
+    publish(tmp_path, keep=1)
+    held = reader.get()
+    publish(tmp_path, keep=1)
+    assert releases(tmp_path) == ["v00000002"]
+    assert len(held.events()) == 3
+    assert held.map_html == "<html>3</html>"
+
+def test_record_failure_keeps_the_last_release(tmp_path):
+    reader = DataPlaneReader(str(tmp_path))
+    publish(tmp_path)
+    release = reader.get()
+
+    record_failure(str(tmp_path), "kandilli: timeout")
+    failed = reader.get()
+    assert failed is release
+    assert failed.error == "kandilli: timeout"
+    assert read_manifest(str(tmp_path))["failed_at"]
+
+    publish(tmp_path)
+    assert reader.get().error is None
+
+def test_record_failure_before_any_release(tmp_path):
+    record_failure(str(tmp_path / "new"), "kandilli: timeout")
+    reader = DataPlaneReader(str(tmp_path / "new"))
+    release = reader.get()
+    assert release.version == 0
+    assert release.events() is None
+    assert release.error == "kandilli: timeout"
+
+def test_reader_keeps_release_when_manifest_is_corrupt(tmp_path):
+    reader = DataPlaneReader(str(tmp_path))
+    publish(tmp_path)
+    release = reader.get()
+    with open(tmp_path / "manifest.json", "w", encoding="utf-8") as f:
+        f.write("{not json")
+    assert reader.get() is release
+
+def test_ingest_records_unexpected_errors(tmp_path, monkeypatch):
+    def broken(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ingest, "run_once", broken)
+    monkeypatch.setattr("sys.argv", ["ingest.py", "--data-dir", str(tmp_path), "--once"])
+    with pytest.raises(SystemExit):
+        ingest.main()
+    assert read_manifest(str(tmp_path))["error"] == "OSError: disk full"
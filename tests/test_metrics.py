@@ -0,0 +1,84 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from metrics import Registry, start_http_server, timed
+
+def test_counter_exposition_uses_total_name_everywhere():
+    registry = Registry()
+    requests = registry.counter("test_requests", "Requests by outcome.", ["outcome"])
+    requests.inc(outcome="ok")
+    requests.inc(2, outcome="error")
+
+    assert registry.expose().splitlines() == [
+        "# HELP test_requests_total Requests by outcome.",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{outcome="error"} 2',
+        'test_requests_total{outcome="ok"} 1',
+    ]
+    assert requests.value(outcome="error") == 2
+    assert requests.value(outcome="missing") == 0
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    seconds = registry.histogram("test_seconds", "Latency.", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        seconds.observe(value, stage="parse")
+
+    assert registry.expose().splitlines() == [
+        "# HELP test_seconds Latency.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{stage="parse",le="0.1"} 2',
+        'test_seconds_bucket{stage="parse",le="1.0"} 3',
+        'test_seconds_bucket{stage="parse",le="+Inf"} 4',
+        'test_seconds_sum{stage="parse"} 3.65',
+        'test_seconds_count{stage="parse"} 4',
+    ]
+    row, = seconds.summary()
+    assert row["labels"] == {"stage": "parse"}
+    assert row["count"] == 4
+    assert row["p50"] == 0.1
+    assert row["p95"] == float("inf")
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    counter = registry.counter("test_escape", "Escaping.", ["value"])
+    counter.inc(value='a"b\\c\nd')
+    assert 'test_escape_total{value="a\\"b\\\\c\\nd"} 1' in registry.expose()
+
+def test_register_reuses_existing_metric():
+    registry = Registry()
+    first = registry.counter("test_reuse", "First.")
+    assert registry.counter("test_reuse", "Second.") is first
+    assert registry.metrics() == [first]
+
+def test_timed_records_calls_that_raise():
+    registry = Registry()
+    seconds = registry.histogram("test_stage_seconds", "Stages.", ["stage"])
+
+    @timed("boom", histogram=seconds)
+    def boom():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        boom()
+    (labels, (_, _, count)), = seconds.samples()
+    assert labels == ("boom",)
+    assert count == 1
+
+def test_http_server_serves_metrics_only():
+    registry = Registry()
+    registry.counter("test_served", "Served.").inc()
+    server = start_http_server(0, host="127.0.0.1", registry=registry)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "test_served_total 1" in response.read().decode("utf-8")
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(f"{base}/other", timeout=5)
+        assert excinfo.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
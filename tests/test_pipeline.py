@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from pipeline import (
+    KANDILLI_HEADER,
+    assess_overall_risk,
+    find_recent_strong_earthquakes,
+    format_kandilli_line,
+    generate_synthetic_sequence,
+    parse_kandilli_text,
+)
+
+def make_event(minutes_ago=10, magnitude=4.2, location="SILIVRI-ISTANBUL", now=datetime(2025, 4, 23, 12, 0, 0)):
+    return {
+        'date': now - timedelta(minutes=minutes_ago),
+        'latitude': 40.8623,
+        'longitude': 28.2157,
+        'depth': 6.9,
+        'magnitude': magnitude,
+        'location': location,
+    }
+
+def test_kandilli_line_round_trip():
+    events = [make_event(10, 6.2), make_event(30, 3.1, "MARMARA EREGLISI (TEKIRDAG)")]
+    content = KANDILLI_HEADER + "\n".join(format_kandilli_line(eq) for eq in events) + "\n"
+
+    parsed = parse_kandilli_text(content)
+
+    assert len(parsed) == 2
+    for original, result in zip(events, parsed):
+        assert result['date'] == original['date']
+        assert result['latitude'] == pytest.approx(original['latitude'])
+        assert result['longitude'] == pytest.approx(original['longitude'])
+        assert result['depth'] == pytest.approx(original['depth'])
+        assert result['magnitude'] == pytest.approx(original['magnitude'])
+        assert result['distance_to_istanbul'] > 0
+    assert parsed[0]['location'] == "SILIVRI-ISTANBUL"
+
+def test_parse_kandilli_skips_malformed_lines():
+    content = KANDILLI_HEADER + "not an earthquake line at all but long enough to split\n\n"
+    assert parse_kandilli_text(content) == []
+
+def test_alert_and_risk_use_the_given_clock():
+    now = datetime(2025, 4, 23, 12, 0, 0)
+    events = [dict(make_event(10, 6.2), distance_to_istanbul=60.0)]
+
+    assert find_recent_strong_earthquakes(events, 4.5, now) == events
+    assert find_recent_strong_earthquakes(events, 4.5, now + timedelta(days=2)) == []
+    assert assess_overall_risk(events, now) is not None
+    assert assess_overall_risk(events, now + timedelta(days=8)) is None
+
+@pytest.mark.parametrize("omori_p", [1.0, 1.1, 0.9])
+def test_synthetic_sequence_stays_in_window(omori_p):
+    start = datetime(2025, 4, 23, 12, 0, 0)
+    events = generate_synthetic_sequence(6.0, start=start, duration_hours=6, omori_p=omori_p, seed=7)
+
+    assert len(events) > 1
+    assert all(start <= eq['date'] <= start + timedelta(hours=6, seconds=1) for eq in events)
+    assert max(eq['magnitude'] for eq in events) == 6.0
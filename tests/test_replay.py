@@ -0,0 +1,26 @@
+from datetime import datetime
+
+import pytest
+
+from pipeline import generate_synthetic_sequence
+from replay import STAGES, run_replay
+
+def test_replay_runs_the_dashboard_load_path():
+    catalog = generate_synthetic_sequence(5.0, start=datetime(2025, 4, 23, 12, 0, 0), duration_hours=1, seed=3)
+    fired = []
+
+    report = run_replay(catalog, speedup=1000, poll_interval=600, notification_threshold=4.5,
+                        on_alert=lambda now, eq, arrival: fired.append(eq))
+
+    assert report["ticks"] == 7
+    assert report["failed_ticks"] == 0
+    assert report["alerts"] == len(fired) == 1
+    assert fired[0]['magnitude'] == 5.0
+    assert set(report["stages"]) == set(STAGES)
+    assert report["parsed_events_per_s"] > 0
+
+def test_replay_rejects_bad_arguments():
+    with pytest.raises(ValueError):
+        run_replay([])
+    with pytest.raises(ValueError):
+        run_replay(generate_synthetic_sequence(5.0, seed=3), speedup=5000)
@@ -0,0 +1,228 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError, StaleWhileRevalidate, retry_with_backoff
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        if isinstance(self.now, datetime):
+            self.now += timedelta(seconds=seconds)
+        else:
+            self.now += seconds
+
+class FakeRandom:
+    def __init__(self):
+        self.ranges = []
+
+    # Always pick the upper bound so the backoff ceiling is visible
+    def uniform(self, low, high):
+        self.ranges.append((low, high))
+        return high
+
+def fail():
+    raise ValueError("upstream down")
+
+def test_breaker_opens_after_threshold_and_rejects_calls():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30, clock=clock)
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            breaker.call(fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(calls.append, 1)
+    assert calls == []
+
+def test_breaker_success_resets_failure_count():
+    breaker = CircuitBreaker("test", failure_threshold=2, clock=FakeClock())
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+    assert breaker.call(lambda: "ok") == "ok"
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_breaker_half_open_allows_a_single_trial():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30, clock=clock)
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+
+    clock.advance(30)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    trial_started = threading.Event()
+    release_trial = threading.Event()
+
+    def slow_trial():
+        trial_started.set()
+        release_trial.wait(5)
+        return "ok"
+
+    thread = threading.Thread(target=breaker.call, args=(slow_trial,))
+    thread.start()
+    try:
+        assert trial_started.wait(5)
+        # A second caller is rejected while the trial is still running
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: "second")
+    finally:
+        release_trial.set()
+        thread.join()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_breaker_failed_trial_reopens_for_a_full_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30, clock=clock)
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            breaker.call(fail)
+
+    clock.advance(30)
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.advance(29)
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.advance(1)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+def test_retry_backs_off_with_full_jitter_until_success():
+    sleeps = []
+    rng = FakeRandom()
+    results = iter([ValueError("1"), ValueError("2"), "ok"])
+
+    def flaky():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    assert retry_with_backoff(flaky, attempts=3, base_delay=0.5, sleep=sleeps.append, rng=rng) == "ok"
+    assert rng.ranges == [(0, 0.5), (0, 1.0)]
+    assert sleeps == [0.5, 1.0]
+
+def test_retry_caps_delay_and_reraises_last_error():
+    sleeps = []
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise ValueError(f"attempt {len(calls)}")
+
+    with pytest.raises(ValueError, match="attempt 5"):
+        retry_with_backoff(failing, attempts=5, base_delay=1.0, max_delay=3.0, sleep=sleeps.append, rng=FakeRandom())
+    assert sleeps == [1.0, 2.0, 3.0, 3.0]
+
+def test_retry_does_not_retry_other_errors_or_open_circuits():
+    sleeps = []
+    for error in (KeyError("not retried"), CircuitOpenError("open")):
+        def raise_error():
+            raise error
+        with pytest.raises(type(error)):
+            retry_with_backoff(raise_error, attempts=3, retry_on=(ValueError, CircuitOpenError),
+                               sleep=sleeps.append, rng=FakeRandom())
+    assert sleeps == []
+
+def test_stale_while_revalidate_cold_start_waits_for_first_load():
+    clock = FakeClock(datetime(2025, 4, 23, 12, 0, 0))
+    source = StaleWhileRevalidate(lambda: ["event"], max_age=60, clock=clock)
+
+    snapshot = source.get(wait=5)
+
+    assert snapshot.data == ["event"]
+    assert snapshot.fetched_at == clock.now
+    assert snapshot.error is None
+    assert not snapshot.refreshing
+
+def test_stale_while_revalidate_serves_stale_data_when_refresh_fails():
+    clock = FakeClock(datetime(2025, 4, 23, 12, 0, 0))
+    calls = []
+
+    def loader():
+        calls.append(clock.now)
+        raise ValueError("upstream down")
+
+    source = StaleWhileRevalidate(loader, max_age=60, retry_interval=15, clock=clock)
+    primed_at = clock.now - timedelta(minutes=5)
+    source.prime(["old"], primed_at)
+
+    source.get()
+    source._done.wait(5)
+    snapshot = source.get()
+    assert snapshot.data == ["old"]
+    assert snapshot.fetched_at == primed_at
+    assert isinstance(snapshot.error, ValueError)
+    assert len(calls) == 1
+
+    # No new attempt before retry_interval has passed
+    clock.advance(10)
+    source.get()
+    assert len(calls) == 1
+
+    clock.advance(5)
+    source.get()
+    source._done.wait(5)
+    assert len(calls) == 2
+
+def test_stale_while_revalidate_cold_start_failure_has_no_data():
+    clock = FakeClock(datetime(2025, 4, 23, 12, 0, 0))
+    source = StaleWhileRevalidate(fail, max_age=60, clock=clock)
+
+    source.get(wait=5)
+    snapshot = source.get()
+
+    assert snapshot.data is None
+    assert snapshot.fetched_at is None
+    assert isinstance(snapshot.error, ValueError)
+
+def test_stale_while_revalidate_prime_keeps_newer_data():
+    clock = FakeClock(datetime(2025, 4, 23, 12, 0, 0))
+    source = StaleWhileRevalidate(fail, max_age=60, clock=clock)
+    source.prime(["new"], clock.now)
+    source.prime(["older"], clock.now - timedelta(seconds=30))
+
+    snapshot = source.get()
+    assert snapshot.data == ["new"]
+    assert not snapshot.refreshing
+
+def test_stale_while_revalidate_prime_clears_an_older_error():
+    clock = FakeClock(datetime(2025, 4, 23, 12, 0, 0))
+    source = StaleWhileRevalidate(fail, max_age=60, clock=clock)
+    source.get(wait=5)
+    assert isinstance(source.get().error, ValueError)
+
+    source.prime(["fresh"], clock.now)
+    snapshot = source.get()
+    assert snapshot.data == ["fresh"]
+    assert snapshot.error is None
+
+def test_stale_while_revalidate_prime_builds_data_only_when_adopted():
+    clock = FakeClock(datetime(2025, 4, 23, 12, 0, 0))
+    source = StaleWhileRevalidate(fail, max_age=60, clock=clock)
+    source.prime(["own"], clock.now)
+    built = []
+
+    def build():
+        built.append(1)
+        return ["published"]
+
+    source.prime(build, clock.now - timedelta(seconds=1))
+    assert built == []
+    assert source.get().data == ["own"]
+
+    source.prime(build, clock.now + timedelta(seconds=1))
+    assert built == [1]
+    assert source.get().data == ["published"]
@@ -0,0 +1,96 @@
+import os
+import struct
+from datetime import datetime, timedelta
+
+import pytest
+
+from snapshot import HEADER, MAGIC, CatalogSnapshot, SnapshotError, SnapshotReader, write_snapshot
+
+FETCHED_AT = datetime(2025, 4, 23, 12, 50, 0, 123456)
+
+def make_events():
+    return [
+        {
+            'date': FETCHED_AT - timedelta(minutes=i, microseconds=7),
+            'latitude': 40.8623 + i / 100,
+            'longitude': 28.2157,
+            'depth': 6.9,
+            'magnitude': 6.2 - i / 10,
+            'location': location,
+            'distance_to_istanbul': 67.5 + i,
+        }
+        for i, location in enumerate(["SILIVRI ACIKLARI-ISTANBUL (MARMARA DENIZI)", "ÇINARCIK-YALOVA", "", "K"])
+    ]
+
+def test_round_trip_is_exact(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    events = make_events()
+    write_snapshot(path, events, FETCHED_AT)
+
+    snapshot = CatalogSnapshot(path)
+
+    assert len(snapshot) == len(events)
+    assert snapshot.fetched_at == FETCHED_AT
+    assert snapshot.events() == events
+    assert snapshot.location(1) == "ÇINARCIK-YALOVA"
+    assert snapshot.columns['magnitude'].tolist() == [eq['magnitude'] for eq in events]
+    assert oct(os.stat(path).st_mode & 0o777) == oct(0o644)
+
+def test_empty_catalog_round_trip(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    write_snapshot(path, [], FETCHED_AT)
+    snapshot = CatalogSnapshot(path)
+    assert len(snapshot) == 0
+    assert snapshot.events() == []
+
+def test_missing_location_is_stored_as_empty(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    events = make_events()
+    events[0]['location'] = None
+    write_snapshot(path, events, FETCHED_AT)
+    assert CatalogSnapshot(path).location(0) == ""
+
+def test_truncated_file_is_rejected(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    write_snapshot(path, make_events(), FETCHED_AT)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 16)
+    with pytest.raises(SnapshotError, match="truncated"):
+        CatalogSnapshot(path)
+
+    with open(path, "r+b") as f:
+        f.truncate(HEADER.size - 1)
+    with pytest.raises(SnapshotError, match="too small"):
+        CatalogSnapshot(path)
+
+@pytest.mark.parametrize("magic,version,message", [(MAGIC, 99, "unsupported snapshot version 99"), (b"NOPE", 1, "not a catalog snapshot")])
+def test_foreign_header_is_rejected(tmp_path, magic, version, message):
+    path = str(tmp_path / "catalog.snap")
+    write_snapshot(path, make_events(), FETCHED_AT)
+    with open(path, "r+b") as f:
+        f.write(struct.pack("<4sH", magic, version))
+    with pytest.raises(SnapshotError, match=message):
+        CatalogSnapshot(path)
+
+def test_reader_reopens_only_replaced_files(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    reader = SnapshotReader(path)
+    assert reader.get() is None
+
+    write_snapshot(path, make_events(), FETCHED_AT)
+    first = reader.get()
+    assert first.fetched_at == FETCHED_AT
+    assert reader.get() is first
+
+    later = FETCHED_AT + timedelta(minutes=1)
+    write_snapshot(path, make_events()[:2], later)
+    second = reader.get()
+    assert second is not first
+    assert second.fetched_at == later
+    # The old mapping stays readable after the file was replaced
+    assert len(first.events()) == 4
+
+    # A corrupt replacement keeps the last good snapshot
+    with open(path, "wb") as f:
+        f.write(b"garbage")
+    assert reader.get() is second